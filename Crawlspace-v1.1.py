@@ -1,16 +1,33 @@
 import webbrowser
 import threading
+import bisect
 import time
 import json
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import re
+from tkinter import font as tkfont
 import os
 import sys
 import shutil
 from datetime import datetime
 import hashlib
+import multiprocessing
+
+import export_fs
+import fuzzy_index
+import json_stream
+import message_fields
+import query_cache
+import result_export
+import search_engine
+import search_index
+import search_query
+import thread_index
+from results_view import ResultsPane, format_match_row
+from search_stats import SearchStats
+from ui_channel import UIChannel
+import workspace_meta
 
 
 def hsl_to_rgb(h, s, l):
@@ -57,15 +74,44 @@ def resource_path(relative_path):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath("."), relative_path)
 
-def display_slack_chat(file_path):
-    """Display Slack chat messages in a tkinter window."""
+# Chat viewer bubble layout
+BUBBLE_WRAP = 600
+BUBBLE_GAP = 5
+BUBBLE_NAME_FONT = ("Arial", 10, "bold")
+BUBBLE_TIME_FONT = ("Arial", 8)
+# Extra distance above and below the viewport to keep bubbles built for
+BUFFER_PIXELS = 600
+# Start loading the neighbouring day once the viewport is this close to either end
+PREFETCH_PIXELS = 2000
+# Days kept loaded in the chat viewer; the ones farthest from the viewport are dropped
+MAX_LOADED_DAYS = 5
+# Outline of the search hit the chat viewer jumped to
+HIT_OUTLINE = "#f0a000"
+# Subtype of the row the chat viewer shows for a day file it couldn't read
+LOAD_ERROR_SUBTYPE = "crawlspace_load_error"
+
+def display_slack_chat(file_path, hit_ts=None, hits=()):
+    """Display a channel's messages in a tkinter window, starting at the day in file_path.
+
+    The channel reads as one timeline: neighbouring day files are loaded in
+    the background as the view nears either end, and days far from the
+    view are dropped again. hit_ts scrolls to and highlights that message of
+    the day; hits, sorted (file path, ts) of search results in the channel
+    (see ResultStore.locations), can then be stepped through.
+    """
     
     def on_mousewheel(event):
         if chat_canvas.winfo_exists():  # Check if the canvas exists before scrolling
             chat_canvas.yview_scroll(-1 * (event.delta // 120), "units")
 
-    def update_scroll_region(event=None):
-        chat_canvas.configure(scrollregion=chat_canvas.bbox("all"))
+    def on_yview_change(first, last):
+        scrollbar.set(first, last)
+        schedule_refresh()
+
+    def on_canvas_resize(event):
+        for _, window_id in visible.values():
+            chat_canvas.itemconfigure(window_id, width=event.width)
+        schedule_refresh()
 
     def format_timestamp(ts):
         try:
@@ -75,33 +121,119 @@ def display_slack_chat(file_path):
             return "Unknown Time"
 
     def extract_message_text(message):
-        text = ""
-        blocks = message.get("blocks", [])
-        try:
-            for block in blocks:
-                if block.get("type") == "rich_text":
-                    for element in block.get("elements", []):
-                        if element.get("type") == "rich_text_section":
-                            text += ''.join(
-                                el.get("text", "") if el.get("type") == "text" else el.get("url", "")
-                                for el in element.get("elements", []))
-        except Exception:
-            text = "[Error Extracting Text]"
-        return text if text else message.get("text", "[No Text]")
-
-    def create_message_bubble(user_name, text, timestamp, color, deleted=False):
-        bubble_frame = tk.Frame(chat_container, bg="white", padx=10, pady=5)
-        bubble_frame.pack(fill=tk.X, pady=5)
-
-        user_label = tk.Label(bubble_frame, text=user_name, bg=color, font=("Arial", 10, "bold"), anchor="w")
+        # Same block extraction the search uses
+        return message_fields.blocks_text(message) or message.get("text", "[No Text]")
+
+    def create_message_bubble():
+        bubble_frame = tk.Frame(chat_canvas, bg="white", padx=10, pady=5)
+
+        user_label = tk.Label(bubble_frame, bg="white", font=BUBBLE_NAME_FONT, anchor="w")
         user_label.pack(fill=tk.X)
 
-        message_label = tk.Label(bubble_frame, text=text, bg=color, fg="black", wraplength=600, anchor="w", justify="left")
+        message_label = tk.Label(bubble_frame, fg="black", wraplength=BUBBLE_WRAP, anchor="w", justify="left")
         message_label.pack(fill=tk.X)
 
-        timestamp_label = tk.Label(bubble_frame, text=timestamp, bg="white", fg="gray", font=("Arial", 8), anchor="e")
+        timestamp_label = tk.Label(bubble_frame, bg="white", fg="gray", font=BUBBLE_TIME_FONT, anchor="e")
         timestamp_label.pack(fill=tk.X)
 
+        # Packed only for messages that are part of a thread
+        thread_label = tk.Label(bubble_frame, bg="white", fg="blue", font=BUBBLE_TIME_FONT, anchor="w", cursor="hand2")
+        thread_label.thread_ts = None
+        thread_label.bind("<Button-1>", lambda e: show_thread(thread_label.thread_ts))
+
+        return bubble_frame, user_label, message_label, timestamp_label, thread_label
+
+    def estimate_height(text):
+        """Guess a bubble's height from its wrapped line count until it is measured."""
+        lines = sum(max(1, -(-message_font.measure(part) // BUBBLE_WRAP)) for part in text.split("\n"))
+        return fixed_height + lines * line_height
+
+    def schedule_refresh():
+        nonlocal refresh_pending
+        if not refresh_pending:
+            refresh_pending = True
+            chat_canvas.after_idle(refresh_visible)
+
+    def show_row(i):
+        """Place a bubble for row i, reusing a released one when possible."""
+        if free_bubbles:
+            bubble = free_bubbles.pop()
+        else:
+            bubble = create_message_bubble()
+        bubble_frame, user_label, message_label, timestamp_label, thread_label = bubble
+        user_name, text, timestamp, color, _deleted, thread = rows[i]
+        user_label.config(text=user_name, bg=color)
+        message_label.config(text=text, bg=color)
+        timestamp_label.config(text=timestamp)
+        if thread is None:
+            thread_label.pack_forget()
+        else:
+            thread_label.thread_ts, link_text = thread
+            thread_label.config(text=link_text)
+            thread_label.pack(fill=tk.X)
+        bubble_frame.config(highlightbackground=HIT_OUTLINE, highlightthickness=2 if i == hit_row() else 0)
+        window_id = chat_canvas.create_window(
+            0, offsets[i] + BUBBLE_GAP, window=bubble_frame, anchor="nw", width=chat_canvas.winfo_width()
+        )
+        visible[i] = (bubble, window_id)
+
+    def hide_row(i):
+        bubble, window_id = visible.pop(i)
+        chat_canvas.delete(window_id)
+        free_bubbles.append(bubble)
+
+    def recompute_offsets():
+        offsets.clear()
+        y = 0
+        for height in heights:
+            offsets.append(y)
+            y += height
+        return y
+
+    def refresh_visible():
+        """Build bubbles for rows near the viewport and release the rest."""
+        nonlocal refresh_pending, total_height
+        refresh_pending = False
+        if not chat_canvas.winfo_exists():
+            return
+
+        top = chat_canvas.canvasy(0)
+        bottom = top + chat_canvas.winfo_height()
+        load_neighbour_days(top, bottom)
+        if not rows:
+            return
+        show_current_day(top)
+        first = max(0, bisect.bisect_right(offsets, top - BUFFER_PIXELS) - 1)
+        last = bisect.bisect_left(offsets, bottom + BUFFER_PIXELS)
+        wanted = range(first, last)
+
+        for i in [i for i in visible if i not in wanted]:
+            hide_row(i)
+        new_rows = [i for i in wanted if i not in visible]
+        for i in new_rows:
+            show_row(i)
+        if not new_rows:
+            return
+
+        # Replace estimates with real heights, keeping the top visible row in place
+        chat_canvas.update_idletasks()
+        anchor = max(0, bisect.bisect_right(offsets, top) - 1)
+        anchor_shift = top - offsets[anchor]
+        changed = False
+        for i in new_rows:
+            height = visible[i][0][0].winfo_reqheight() + 2 * BUBBLE_GAP
+            if height != heights[i]:
+                heights[i] = height
+                changed = True
+        if not changed:
+            return
+
+        total_height = recompute_offsets()
+        chat_canvas.configure(scrollregion=(0, 0, 0, total_height))
+        for i, (_, window_id) in visible.items():
+            chat_canvas.coords(window_id, 0, offsets[i] + BUBBLE_GAP)
+        chat_canvas.yview_moveto((offsets[anchor] + anchor_shift) / total_height)
+
     def get_user_color(user_id):
         """Ensure unique color is assigned to each user based on user_id."""
         if user_id not in user_colors:
@@ -121,52 +253,253 @@ def display_slack_chat(file_path):
         
         return user_colors[user_id]
 
-    def display_chat(data):
-        for widget in chat_container.winfo_children():
-            widget.destroy()
-
-        for message in data:
-            if message.get('subtype') == "message_deleted":
-                display_deleted_message(message)
-            else:
-                display_regular_message(message)
-
-    def load_users(folder_path):
-        """Load the user data from the users.json file in the selected folder."""
-        try:
-            # Construct the full path to the users.json file
-            users_file_path = os.path.join(folder_path, "users.json")
-            
-            with open(users_file_path, "r") as f:
-                data = json.load(f)
-                
-                # Ensure the data is a list
-                if isinstance(data, list):
-                    return data
-                else:
-                    raise ValueError("The users.json file must be an array of user objects.")
-        
-        except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
-            print(f"Error loading users: {e}")  # Log the error for debugging
-            return []
+    def shift_visible(delta):
+        """Renumber the built bubbles after rows were added or removed above them."""
+        shifted = [(i + delta, bubble) for i, bubble in visible.items()]
+        visible.clear()
+        visible.update(shifted)
+
+    def insert_day(day_path, messages, at_start):
+        """Add a day's messages before or after the loaded ones, keeping the view where it is."""
+        nonlocal total_height
+        messages = [message for message in messages if isinstance(message, dict)]
+        new_rows = [message_row(message) for message in messages]
+        new_heights = [estimate_height(row[1]) for row in new_rows]
+        # ts -> position in the day, for jumping to search hits; a message's own ts wins
+        ts_rows = {}
+        for own_ts_only in (True, False):
+            for position, message in enumerate(messages):
+                message_timestamps = message_fields.timestamps(message)
+                for ts in message_timestamps[:1] if own_ts_only else message_timestamps:
+                    ts_rows.setdefault(ts, position)
+        top = chat_canvas.canvasy(0)
+        if at_start:
+            shift_visible(len(new_rows))
+            rows[:0] = new_rows
+            heights[:0] = new_heights
+            days.insert(0, [day_path, len(new_rows), ts_rows])
+            top += sum(new_heights)
+        else:
+            rows.extend(new_rows)
+            heights.extend(new_heights)
+            days.append([day_path, len(new_rows), ts_rows])
+        top = drop_far_day(top, from_start=not at_start)
+
+        total_height = recompute_offsets()
+        chat_canvas.configure(scrollregion=(0, 0, 0, total_height))
+        for i, (_, window_id) in visible.items():
+            chat_canvas.coords(window_id, 0, offsets[i] + BUBBLE_GAP)
+        chat_canvas.yview_moveto(top / total_height if total_height else 0)
+        schedule_refresh()
+
+    def drop_far_day(top, from_start):
+        """Drop the day at one end once too many are loaded, if it is well out of view; return the new top."""
+        if len(days) <= MAX_LOADED_DAYS:
+            return top
+        count = days[0][1] if from_start else days[-1][1]
+        if from_start:
+            removed_height = sum(heights[:count])
+            if removed_height >= top - BUFFER_PIXELS:
+                return top
+            for i in [i for i in visible if i < count]:
+                hide_row(i)
+            del rows[:count], heights[:count], days[0]
+            shift_visible(-count)
+            return top - removed_height
+        kept_height = sum(heights[:len(heights) - count])
+        if kept_height <= top + chat_canvas.winfo_height() + BUFFER_PIXELS:
+            return top
+        for i in [i for i in visible if i >= len(rows) - count]:
+            hide_row(i)
+        del rows[len(rows) - count:], heights[len(heights) - count:], days[-1]
+        return top
+
+    def load_neighbour_days(top, bottom):
+        if top < PREFETCH_PIXELS:
+            load_day(at_start=True)
+        if bottom > total_height - PREFETCH_PIXELS:
+            load_day(at_start=False)
+
+    def load_day(at_start):
+        """Read the day before the first loaded one (or after the last) in the background."""
+        if at_start in loading:
+            return
+        position = day_files.index(days[0][0]) - 1 if at_start else day_files.index(days[-1][0]) + 1
+        if not 0 <= position < len(day_files):
+            return
+        day_path = day_files[position]
+        loading.add(at_start)
+        messages = []
+        started_timeline = timeline
+
+        def day_loaded(info):
+            loading.discard(at_start)
+            if not chat_canvas.winfo_exists() or timeline != started_timeline:
+                return
+            # The day it borders may have been dropped meanwhile; then it no longer fits on
+            edge = days[0][0] if at_start else days[-1][0]
+            if day_files.index(edge) != position + (1 if at_start else -1):
+                return
+            insert_day(day_path, messages, at_start)
+
+        def show_load_errors(errors):
+            # A row in place of the day's messages; scrolling carries on past it
+            messages.extend({"subtype": LOAD_ERROR_SUBTYPE, "text": error, "ts": ""} for error in errors)
+
+        day_channel = UIChannel(slack_chat_window, on_results=messages.extend, on_error=show_load_errors, on_done=day_loaded)
+
+        def read_day():
+            try:
+                day_channel.add_results(list(json_stream.iter_items(day_path)))
+            except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+                day_channel.error(f"Failed to load {day_path}: {e}")
+            day_channel.close()
+
+        day_channel.start()
+        threading.Thread(target=read_day, daemon=True).start()
+
+    def show_current_day(top):
+        """Show the path of the day at the top of the view."""
+        nonlocal current_day
+        row = max(0, bisect.bisect_right(offsets, top) - 1)
+        for day_path, count, _ts_rows in days:
+            if row < count:
+                break
+            row -= count
+        if day_path != current_day:
+            current_day = day_path
+            file_path_entry.delete(0, tk.END)
+            file_path_entry.insert(0, day_path)
 
-    
     def get_real_name_from_users(user_id):
-        """Get the real name of a user from the users.json file."""
-        users = load_users(folder_path)  # Load users from the given folder
-        if not users:
-            return "Unknown User"
-        
-        # Search for the user in the list by matching the 'id'
-        user = next((u for u in users if u.get('id') == user_id), None)
-        
-        if user:
-            return user.get("profile", {}).get("real_name", "Unknown User")
-        else:
-            return "Unknown User"
+        """Get the real name of a user from the export's users.json file."""
+        return workspace.real_name(user_id)
 
     
-    def display_regular_message(message):
+    def row_of(day_path, ts):
+        """Return the row of the message with ts in a loaded day, or None."""
+        first = 0
+        for loaded_path, count, ts_rows in days:
+            if loaded_path == day_path:
+                position = ts_rows.get(ts)
+                return None if position is None else first + position
+            first += count
+        return None
+
+    def hit_row():
+        return None if current_hit is None else row_of(*current_hit)
+
+    def open_day(day_path):
+        """Start the timeline over at day_path, e.g. to jump to a hit far from the loaded days."""
+        nonlocal timeline, current_day
+        try:
+            messages = list(json_stream.iter_items(day_path))
+        except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+            messagebox.showerror("Error", f"Failed to load JSON file: {e}", parent=slack_chat_window)
+            return False
+        for i in list(visible):
+            hide_row(i)
+        rows.clear()
+        heights.clear()
+        days.clear()
+        # Days still being read belong to the old timeline
+        timeline += 1
+        loading.clear()
+        current_day = None
+        insert_day(day_path, messages, at_start=False)
+        return True
+
+    def show_hit(hit_index):
+        """Scroll to hits[hit_index] and highlight it, loading its day if need be."""
+        nonlocal current_hit
+        day_path, ts = hits[hit_index]
+        if not any(loaded_path == day_path for loaded_path, _count, _ts_rows in days) and not open_day(day_path):
+            return
+        previous_row = hit_row()
+        current_hit = (day_path, ts)
+        hit_label.config(text=f"Hit {hit_index + 1} of {len(hits)}")
+        prev_hit_button.config(state=tk.NORMAL if hit_index > 0 else tk.DISABLED)
+        next_hit_button.config(state=tk.NORMAL if hit_index < len(hits) - 1 else tk.DISABLED)
+        # Rebuild the bubbles whose outline changes
+        for i in (previous_row, hit_row()):
+            if i in visible:
+                hide_row(i)
+        row = hit_row()
+        if row is not None:
+            chat_canvas.yview_moveto(offsets[row] / total_height)
+        schedule_refresh()
+
+    def step_hit(step):
+        if current_hit in hit_positions:
+            show_hit(hit_positions[current_hit] + step)
+
+    def show_thread(thread_ts):
+        """Open a thread's messages, from all the days they were posted on, in a window of their own."""
+        channel_folder = os.path.dirname(file_path)
+        messages = []
+
+        def show_errors(errors):
+            messagebox.showerror("Error", "\n".join(errors), parent=slack_chat_window)
+
+        def thread_loaded(info):
+            if not slack_chat_window.winfo_exists():
+                return
+            if messages:
+                display_thread(messages)
+            elif not info.get("failed"):
+                messagebox.showinfo("Thread", "No messages of this thread were found.", parent=slack_chat_window)
+
+        thread_channel = UIChannel(slack_chat_window, on_results=messages.extend, on_error=show_errors,
+                                   on_done=thread_loaded)
+
+        def read():
+            # Builds the channel's thread index on first use
+            try:
+                thread_channel.add_results(thread_index.read_thread(export_root, channel_folder, thread_ts))
+            except Exception as e:
+                thread_channel.error(f"Failed to load thread: {e}")
+                thread_channel.close(failed=True)
+                return
+            thread_channel.close()
+
+        thread_channel.start()
+        threading.Thread(target=read, daemon=True).start()
+
+    def display_thread(messages):
+        thread_window = tk.Toplevel(slack_chat_window)
+        thread_window.title(f"Crawlspace Thread - {workspace.channel_name(file_path)}")
+        thread_window.geometry("600x500")
+        thread_text = tk.Text(thread_window, wrap=tk.WORD, padx=10, pady=5)
+        thread_scrollbar = ttk.Scrollbar(thread_window, orient=tk.VERTICAL, command=thread_text.yview)
+        thread_text.configure(yscrollcommand=thread_scrollbar.set)
+        thread_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        thread_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        thread_text.tag_configure("time", foreground="gray", font=BUBBLE_TIME_FONT)
+        for user_name, text, timestamp, color, _deleted, _thread in map(message_row, messages):
+            tag = f"name-{color}"
+            thread_text.tag_configure(tag, background=color, font=BUBBLE_NAME_FONT)
+            thread_text.insert(tk.END, user_name + "\n", tag)
+            thread_text.insert(tk.END, text + "\n")
+            thread_text.insert(tk.END, timestamp + "\n\n", "time")
+        thread_text.config(state=tk.DISABLED)
+
+    def thread_link(message):
+        """Return (thread_ts, link text) for a message in a thread, or None."""
+        thread_ts = message.get("thread_ts")
+        if not thread_ts:
+            return None
+        if thread_ts == message.get("ts"):
+            replies = message.get("reply_count") or len(message.get("replies") or ())
+            return thread_ts, f"View thread ({replies} replies)" if replies else "View thread"
+        return thread_ts, "View whole thread"
+
+    def message_row(message):
+        """Return the (user name, text, timestamp, color, deleted, thread link) row shown for a message."""
+        if message.get('subtype') == "message_deleted":
+            return deleted_message_row(message)
+        return regular_message_row(message)
+
+    def regular_message_row(message):
         # Check if the message contains files (file upload handling)
         if "files" in message and message["files"]:
             # Get the user ID from the message
@@ -177,11 +510,16 @@ def display_slack_chat(file_path):
         elif message.get("subtype") == "message_changed":
             # Handle edited messages
             user_profile = message.get("original", {}).get("user_profile", {})
-            display_name = user_profile.get("real_name") or "Unknown User"  # Fallback to "Unknown User"
-            display_name += " (Edited Message)"  # Append (Edited Message) to the display name
             user_id = message.get("original", {}).get("user", "unknown_user")
+            display_name = user_profile.get("real_name") or get_real_name_from_users(user_id)  # Fallback to users.json
+            display_name += " (Edited Message)"  # Append (Edited Message) to the display name
             # Get the text from the edited message
             text = extract_message_text(message.get("original", {}))
+        elif message.get("subtype") == LOAD_ERROR_SUBTYPE:
+            # A day file that couldn't be read
+            user_id = "system"
+            display_name = "Crawlspace"
+            text = message["text"]
         elif message.get("subtype") in ["channel_name", "channel_topic", "channel_purpose"]:
             # Handle system messages for channel updates
             user_id = "system"  # Use a placeholder ID for system messages
@@ -191,7 +529,7 @@ def display_slack_chat(file_path):
             # Regular message handling (not a file upload or edited message)
             user_id = message.get("user", "unknown_user")
             user_profile = message.get("user_profile", {})
-            display_name = user_profile.get("real_name") or "Unknown User"  # Fallback to "Unknown User"
+            display_name = user_profile.get("real_name") or get_real_name_from_users(user_id)  # Fallback to users.json
             # Get the text from the message
             text = extract_message_text(message)
         
@@ -202,48 +540,44 @@ def display_slack_chat(file_path):
         # Get the color associated with this user (or bot)
         user_color = get_user_color(user_id)
         
-        # Create the message bubble with the correct user or bot details
-        create_message_bubble(display_name, text, format_timestamp(message.get("ts", "0")), user_color)
-
-    
-    def get_user_name(user_id):
-        # Retrieve user profile information based on user_id
-        # Assume a function get_user_profile_by_id that fetches the user data by user_id
-        user_profile = get_user_profile_by_id(user_id)
-        return user_profile.get("real_name", "Unknown User")
-    
-    def get_user_profile_by_id(user_id):
-        # This function simulates fetching the user profile by user_id.
-        # Replace this with your actual method to get user profiles.
-        user_profiles = {
-            "U079R4A554J": {"real_name": "Matthew Baker"},
-            "U0664M6ATQE": {"real_name": "Chris Tang"},
-            # Add more user profiles here as needed
-        }
-        return user_profiles.get(user_id, {"real_name": "Unknown User"})
+        # The row's bubble is only built once it scrolls into view
+        return display_name, text, format_timestamp(message.get("ts", "0")), user_color, False, thread_link(message)
 
-
-    
-    def display_deleted_message(message):
+    def deleted_message_row(message):
         original_message = message.get("original", {})
         user_id = original_message.get("user", "unknown_user")
         user_profile = original_message.get("user_profile", {})
-        user_name = user_profile.get("display_name") or user_profile.get("real_name") or "Unknown User"
+        user_name = user_profile.get("display_name") or user_profile.get("real_name") or get_real_name_from_users(user_id)
         timestamp = format_timestamp(message.get("ts", "0"))
         text = extract_message_text(original_message)
 
         user_color = get_user_color(user_id)
-        create_message_bubble(user_name + " (Deleted)", text, timestamp, user_color, deleted=True)
+        return user_name + " (Deleted)", text, timestamp, user_color, True, None
 
     user_colors = {}  # Dictionary to hold the user colors
 
-    if not file_path or not os.path.exists(file_path):
+    # Only the bubbles near the viewport exist as widgets. Every message of
+    # the loaded days has a row plus an estimated (later measured) height,
+    # and offsets holds the running total so the scrollbar covers them all.
+    rows = []
+    heights = []
+    offsets = []
+    visible = {}  # row index -> (bubble widgets, canvas window id)
+    free_bubbles = []
+    total_height = 0
+    refresh_pending = False
+    days = []  # [day file path, row count, {ts: position in the day}] of the loaded days, in order
+    loading = set()  # ends (at_start True/False) with a day being read
+    timeline = 0  # bumped when the loaded days are replaced
+    current_day = None
+    current_hit = None  # (day file path, ts) of the highlighted search hit
+
+    if not file_path or not export_fs.exists(file_path):
         messagebox.showerror("Error", "Invalid file path or file does not exist.")
         return
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        data = list(json_stream.iter_items(file_path))
     except json.JSONDecodeError as e:
         messagebox.showerror("Error", "Invalid JSON file format.")
         return
@@ -251,9 +585,13 @@ def display_slack_chat(file_path):
         messagebox.showerror("Error", f"Failed to load JSON file: {e}")
         return
 
+    # Users and channels come from the export this file belongs to
+    export_root = workspace_meta.find_export_root(file_path, folder_data)
+    workspace = workspace_meta.get_workspace(export_root)
+
     # Create a new window for Slack Chat Viewer
     slack_chat_window = tk.Toplevel()  # Create a new window (Toplevel)
-    slack_chat_window.title("Crawlspace Chat Viewer")
+    slack_chat_window.title(f"Crawlspace Chat Viewer - {workspace.channel_name(file_path)}")
     slack_chat_window.geometry("800x600")
     set_app_icon(slack_chat_window)
 
@@ -265,6 +603,16 @@ def display_slack_chat(file_path):
     file_path_entry.pack(pady=5)
     file_path_entry.insert(0, file_path)
 
+    # Stepping through the search hits of this channel
+    hit_frame = tk.Frame(slack_chat_window)
+    hit_frame.pack(pady=5)
+    prev_hit_button = ttk.Button(hit_frame, text="< Previous Hit", state=tk.DISABLED, command=lambda: step_hit(-1))
+    prev_hit_button.pack(side=tk.LEFT, padx=5)
+    hit_label = tk.Label(hit_frame, text="")
+    hit_label.pack(side=tk.LEFT, padx=5)
+    next_hit_button = ttk.Button(hit_frame, text="Next Hit >", state=tk.DISABLED, command=lambda: step_hit(1))
+    next_hit_button.pack(side=tk.LEFT, padx=5)
+
     chat_frame = tk.Frame(slack_chat_window)
     chat_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -274,16 +622,35 @@ def display_slack_chat(file_path):
     scrollbar = ttk.Scrollbar(chat_frame, orient=tk.VERTICAL, command=chat_canvas.yview)
     scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-    chat_canvas.configure(yscrollcommand=scrollbar.set)
-
-    chat_container = tk.Frame(chat_canvas, bg="white")
-    chat_canvas.create_window((0, 0), window=chat_container, anchor="nw")
+    chat_canvas.configure(yscrollcommand=on_yview_change, yscrollincrement=20)
 
     chat_canvas.bind_all("<MouseWheel>", on_mousewheel)
-    chat_container.bind("<Configure>", update_scroll_region)
+    chat_canvas.bind("<Configure>", on_canvas_resize)
+
+    # Font metrics used to estimate bubble heights before they are built
+    message_font = tkfont.nametofont("TkDefaultFont")
+    line_height = message_font.metrics("linespace")
+    fixed_height = (
+        tkfont.Font(font=BUBBLE_NAME_FONT).metrics("linespace")
+        + tkfont.Font(font=BUBBLE_TIME_FONT).metrics("linespace")
+        + 2 * 5 + 2 * BUBBLE_GAP + 12  # frame padding, gaps and label borders
+    )
+
+    # The clicked day first; the days around it follow as the view nears them
+    day_files = search_engine.channel_day_files(file_path)
+    if file_path not in day_files:
+        day_files = [file_path]
+    insert_day(file_path, data, at_start=False)
 
-    # Call display_chat automatically after loading the file
-    display_chat(data)
+    day_file_set = set(day_files)
+    hits = [hit for hit in hits if hit[0] in day_file_set]
+    hit_positions = {hit: hit_index for hit_index, hit in enumerate(hits)}
+    if (file_path, hit_ts) in hit_positions:
+        show_hit(hit_positions[(file_path, hit_ts)])
+    elif hit_ts is not None:
+        hits = [(file_path, hit_ts)]
+        hit_positions = {hits[0]: 0}
+        show_hit(0)
 
 
 
@@ -294,29 +661,46 @@ def load_folder():
     global folder_path
     folder_path = filedialog.askdirectory()
     if folder_path:
-        global folder_data, total_files
-        folder_data = folder_path
-        folder_label.config(text=f"Folder: {folder_path}")
+        set_export(folder_path)
 
-        # Count total .json files in the folder
-        total_files = sum(len(files) for _, _, files in os.walk(folder_data) if any(f.endswith(".json") for f in files))
-        
-        # Update the file count label
-        file_count_label.config(text=f"Total JSON Files: {total_files}")
+def load_zip():
+    """Load a zipped Slack export without extracting it."""
+    global folder_path
+    zip_path = filedialog.askopenfilename(filetypes=[("Slack Export", "*.zip"), ("All Files", "*.*")])
+    if not zip_path:
+        return
+    try:
+        folder_path = export_fs.export_root(zip_path)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to open zip export: {e}")
+        return
+    set_export(folder_path)
+
+def set_export(path):
+    """Make path (a folder or a folder inside a zip export) the one to search."""
+    global folder_data, total_files
+    folder_data = path
+    folder_label.config(text=f"Folder: {path}")
+
+    # Count total .json files in the folder
+    total_files = len(search_index.list_json_files(folder_data))
 
-        progress_label.config(text=f"Files Scanned: 0/{total_files}")
+    # Update the file count label
+    file_count_label.config(text=f"Total JSON Files: {total_files}")
+
+    progress_label.config(text=f"Files Scanned: 0/{total_files}")
 
 def load_search_words():
-    """Load a list of search words from a file."""
+    """Load a list of search words from a file, one group of words per line, matched as plain words."""
     file_path = filedialog.askopenfilename(
         filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
     )
     if file_path:
         try:
             with open(file_path, "r", encoding="utf-8") as file:
-                words = [line.strip() for line in file if line.strip()]
+                words = search_query.quote_word_list(file.read())
                 search_words_entry.delete(1.0, tk.END)
-                search_words_entry.insert(tk.END, "\n".join(words))
+                search_words_entry.insert(tk.END, words)
             messagebox.showinfo("Success", "Search words loaded successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load search words: {e}")
@@ -325,7 +709,7 @@ def show_search_criteria_info():
     """Show a small window with instructions on how to use the search feature."""
     info_window = tk.Toplevel(root)
     info_window.title("Search Criteria Instructions")
-    info_window.geometry("400x200")
+    info_window.geometry("460x420")
     set_app_icon(info_window)
     
     # Get the mouse position
@@ -337,178 +721,307 @@ def show_search_criteria_info():
     
     info_label = ttk.Label(info_window, text=(
         "Search Criteria Format:\n\n"
-        "- Enter one word per line to search for individual words.\n"
-        "- Use multiple words on a single line for a phrase search.\n"
-        "- Words are NOT case-insensitive.\n"
-        "- The search will find matches for any word or phrase.\n"
-        "- You can mix single words and phrases."
+        "- Each line is a separate search; a sentence matching any line is shown.\n"
+        "- Words on one line must all appear in the same sentence.\n"
+        "- Words are case-insensitive and match whole words only.\n\n"
+        "Within a line:\n"
+        "- \"bob merger\"  exact phrase (quotes also search for AND, OR, NOT)\n"
+        "- wire OR transfer  either word\n"
+        "- password NOT test  leave out sentences with test\n"
+        "- (wire OR transfer) bank  group with parentheses\n"
+        "- merger NEAR/5 bob  within 5 words of each other\n"
+        "- user:alice  messages by a user (name or user ID)\n"
+        "- channel:general  messages in a channel\n"
+        "- deleted:yes / deleted:no  only, or no, deleted messages\n"
+        "- after:2021-03-01 / before:2021-04-01  days after or before (excluded)\n"
+        "- on:2021-03-15 / during:2021-03  a day, month or year\n"
+        "- date:2021-03-01..2021-03-31  a range of days (ends included)\n\n"
+        "Channels, Users, From and To below apply to every line."
     ))
     info_label.pack(pady=10, padx=10)
 
     close_button = ttk.Button(info_window, text="Close", command=info_window.destroy)
     close_button.pack(pady=5)
 
-def search_words():
-    """Search for multiple words in all JSON files within the selected folder."""
+def show_diagnostics():
+    """Show the timing breakdown of the last search run with diagnostics on."""
+    if last_search_stats is None:
+        messagebox.showinfo("Diagnostics", "Tick \"Diagnostics\" and run a search to collect timings.")
+        return
+
+    stats = last_search_stats
+    diagnostics_window = tk.Toplevel(root)
+    diagnostics_window.title("Search Diagnostics")
+    diagnostics_window.geometry("800x400")
+    set_app_icon(diagnostics_window)
+
+    summary_text = tk.Text(diagnostics_window, wrap=tk.NONE, font=("Courier", 10), relief="solid", borderwidth=2)
+    summary_text.insert(tk.END, stats.summary())
+    summary_text.config(state=tk.DISABLED)
+    summary_text.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def export_json():
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if not file_path:
+            return
+        try:
+            stats.save(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save diagnostics: {e}")
+
+    button_frame = ttk.Frame(diagnostics_window)
+    button_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+    ttk.Button(button_frame, text="Export JSON", command=export_json).pack(side=tk.LEFT)
+    ttk.Button(button_frame, text="Close", command=diagnostics_window.destroy).pack(side=tk.RIGHT)
+
+def export_results():
+    """Run the search and stream every result to a CSV or JSONL file."""
+    export_path = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV Files", "*.csv"), ("JSON Lines", "*.jsonl"), ("All Files", "*.*")]
+    )
+    if export_path:
+        search_words(export_path)
+
+def split_list(text):
+    """Split a comma-separated entry into its non-empty items."""
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def search_words(export_path=None):
+    """Search for multiple words in all JSON files within the selected folder.
+
+    With export_path, results are written to that file as they are found
+    instead of being shown in the results pane.
+    """
     if not folder_data:
         messagebox.showerror("Error", "No folder selected!")
         return
 
-    words = search_words_entry.get(1.0, tk.END).strip().splitlines()
-    if not words:
+    query_text = search_words_entry.get(1.0, tk.END).strip()
+    if not query_text:
         messagebox.showerror("Error", "Please enter or load search words.")
         return
+    try:
+        query = search_query.parse(query_text, fuzzy=fuzzy_var.get())
+        search_engine.add_form_filters(
+            query,
+            split_list(channels_entry.get()),
+            split_list(users_entry.get()),
+            date_from_entry.get().strip(),
+            date_to_entry.get().strip(),
+        )
+    except search_query.QueryError as e:
+        messagebox.showerror("Invalid Search", str(e))
+        return
+
+    workspace = workspace_meta.get_workspace(folder_data)
+    writer = None
+    if export_path:
+        try:
+            writer = result_export.open_writer(export_path, workspace=workspace)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to create export file: {e}")
+            return
 
     # Disable buttons during search
     search_button.config(state=tk.DISABLED)
+    export_button.config(state=tk.DISABLED)
+    index_button.config(state=tk.DISABLED)
     load_words_button.config(state=tk.DISABLED)
+    workers_spinbox.config(state=tk.DISABLED)
     search_words_label.config(state=tk.DISABLED)
     folder_button.config(state=tk.DISABLED)
+    zip_button.config(state=tk.DISABLED)
     search_words_entry.config(state=tk.DISABLED)
 
     # Clear previous results
-    results_text.config(state=tk.NORMAL)
-    results_text.delete(1.0, tk.END)
     results_label.config(text="")
     progress_bar["value"] = 0
     progress_label.config(text="Files Scanned: 0/0")
 
-    results = []
+    try:
+        workers = max(1, int(workers_spinbox.get()))
+    except ValueError:
+        workers = 1
+
+    # Optional limits; blank or invalid entries mean no limit
+    try:
+        max_results = int(max_results_entry.get()) if max_results_entry.get().strip() else None
+    except ValueError:
+        max_results = None
+    try:
+        time_limit = float(time_limit_entry.get()) if time_limit_entry.get().strip() else None
+    except ValueError:
+        time_limit = None
+    control = search_engine.SearchControl(max_results=max_results, time_limit=time_limit)
+    stop_button.config(state=tk.NORMAL, command=control.cancel)
+    # Timings are only collected when asked for
+    stats = SearchStats() if diagnostics_var.get() else None
+    files_scanned = (0, 0)
+
+    def update_progress(done, total):
+        nonlocal files_scanned
+        files_scanned = (done, total)
+        progress_bar["value"] = (done / total) * 100 if total else 0
+        progress_label.config(text=f"Files Scanned: {done}/{total}")
+
+    def format_result(result):
+        real_name, sentence, spans, file_path = result
+        channel = workspace.channel_name(file_path)
+        return format_match_row([("Real Name", real_name), ("Channel", channel)], sentence, spans, file_path)
+
+    results_pane.reset(format_result)
+
+    def show_errors(errors):
+        shown = "\n".join(errors[:10])
+        if len(errors) > 10:
+            shown += f"\n...and {len(errors) - 10} more"
+        messagebox.showerror("Error", shown)
+
+    def show_results(results):
+        if stats is None:
+            results_pane.append(results)
+        else:
+            with stats.timer("display"):
+                results_pane.append(results)
+
+    def finish_search(info):
+        global last_search_stats
+        elapsed_time = info.get("elapsed_time", 0)
+        if stats is not None:
+            last_search_stats = stats
+        if writer is not None:
+            exported = info.get("exported", 0)
+            stopped = f" (search stopped: {control.stop_reason})" if control.stop_reason else ""
+            results_label.config(
+                text=f"Exported {exported} results to {os.path.basename(export_path)} "
+                     f"in {elapsed_time:.2f} seconds{stopped}"
+            )
+        elif control.stop_reason:
+            done, total = files_scanned
+            results_label.config(
+                text=f"Search stopped ({control.stop_reason}): {len(results_pane.store)} results "
+                     f"in {elapsed_time:.2f} seconds, {done}/{total} files scanned"
+            )
+        elif results_pane.store:
+            similar = sum(len(words) for words in query.expansions.values())
+            fuzzy_note = f" (fuzzy: also matched {similar} similar words)" if similar else ""
+            cache_note = " (from cache)" if control.from_cache else ""
+            results_label.config(
+                text=f"Total Results Found: {len(results_pane.store)} in {elapsed_time:.2f} seconds"
+                     f"{cache_note}{fuzzy_note}"
+            )
+        else:
+            results_label.config(
+                text=f"No matches found for the search words in {elapsed_time:.2f} seconds"
+            )
+
+        # Re-enable buttons after the search is complete
+        stop_button.config(state=tk.DISABLED)
+        search_button.config(state=tk.NORMAL)
+        export_button.config(state=tk.NORMAL)
+        index_button.config(state=tk.NORMAL)
+        load_words_button.config(state=tk.NORMAL)
+        workers_spinbox.config(state=tk.NORMAL)
+        search_words_label.config(state=tk.NORMAL)
+        folder_button.config(state=tk.NORMAL)
+        zip_button.config(state=tk.NORMAL)
+        search_words_entry.config(state=tk.NORMAL)
+
+    # The worker thread never touches widgets; everything goes through the channel
+    channel = UIChannel(root, on_progress=update_progress, on_results=show_results,
+                        on_error=show_errors, on_done=finish_search)
 
     def perform_search():
         """Run the search in a separate thread to avoid blocking the UI."""
+        # Start the timer
+        start_time = time.time()
         try:
-            # Start the timer
-            start_time = time.time()
-
-            def extract_sentences(value, word_groups):
-                """Extract sentences containing exact words or all words in a phrase (in any order)."""
-                sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', value)
-                return [
-                    sentence
-                    for sentence in sentences
-                    if any(
-                        all(re.search(r'\b{}\b'.format(re.escape(word)), sentence, re.IGNORECASE) for word in group)
-                        for group in word_groups
-                    )
-                ]
-
-            def find_real_name(data):
-                """Find the real name in the JSON data, including for deleted messages."""
-                if isinstance(data, dict):
-                    # Check for regular message
-                    if "user_profile" in data:
-                        return data["user_profile"].get("real_name", "N/A")
-                    
-                    # Check for deleted message (real name is under 'original.user_profile')
-                    elif "subtype" in data and data["subtype"] == "message_deleted" and "original" in data:
-                        return data["original"].get("user_profile", {}).get("real_name", "N/A")
-                
-                return "N/A"
-
-            def scan_dict(d, file_path, word_groups):
-                """Scan dictionary for text and deleted messages."""
-                real_name = find_real_name(d)
-            
-                # Handle regular messages
-                if "text" in d and isinstance(d["text"], str):
-                    sentences = extract_sentences(d["text"], word_groups)
-                    for sentence in sentences:
-                        highlighted_sentence = sentence
-                        for word in sum(word_groups, []):  # Flatten word_groups to highlight individual words
-                            highlighted_sentence = re.sub(
-                                rf"(\b{re.escape(word)}\b)", r"*\1*", highlighted_sentence, flags=re.IGNORECASE
-                            )
-                        results.append((real_name, highlighted_sentence, file_path))
-            
-                # Handle deleted messages
-                if d.get("subtype") == "message_deleted" and "original" in d and isinstance(d["original"], dict):
-                    original_text = d["original"].get("text", "")
-                    if original_text:
-                        sentences = extract_sentences(original_text, word_groups)
-                        for sentence in sentences:
-                            highlighted_sentence = sentence
-                            for word in sum(word_groups, []):  # Flatten word_groups to highlight individual words
-                                highlighted_sentence = re.sub(
-                                    rf"(\b{re.escape(word)}\b)", r"*\1*", highlighted_sentence, flags=re.IGNORECASE
-                                )
-                            results.append(
-                                (f"{real_name} (Deleted Message)", highlighted_sentence, file_path)
-                            )
-
-            # Process search words into groups (single words or multi-word phrases on the same line)
-            word_groups = [line.strip().split() for line in words if line.strip()]
-
-            # Count total files for progress tracking
-            total_files = sum(len(files) for _, _, files in os.walk(folder_data))
-            current_file = 0
-
-            # Loop through all JSON files in the folder
-            for dirpath, _, files in os.walk(folder_data):
-                for file in files:
-                    if file.endswith(".json"):
-                        file_path = os.path.join(dirpath, file)
-                        current_file += 1
-                        progress_bar["value"] = (current_file / total_files) * 100
-                        progress_label.config(
-                            text=f"Files Scanned: {current_file}/{total_files}"
-                        )
-                        root.update_idletasks()
-
-                        try:
-                            with open(file_path, "r", encoding="utf-8") as json_file:
-                                data = json.load(json_file)
-                                if isinstance(data, dict):
-                                    scan_dict(data, file_path, word_groups)
-                                elif isinstance(data, list):
-                                    for item in data:
-                                        if isinstance(item, dict):
-                                            scan_dict(item, file_path, word_groups)
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Error reading file {file_path}: {e}")
-
-            # Stop the timer
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-
-            # Display results
-            if results:
-                for real_name, highlighted_sentence, file_path in results:
-                    result_text = f"Real Name: {real_name}\nMatch: {highlighted_sentence}\nFile Path: {file_path}\n{'-'*50}\n"
-                    results_text.insert(tk.END, result_text)
-
-                results_label.config(
-                    text=f"Total Results Found: {len(results)} in {elapsed_time:.2f} seconds"
-                )
-            else:
-                results_label.config(
-                    text=f"No matches found for the search words in {elapsed_time:.2f} seconds"
-                )
+            for result in search_engine.iter_search(
+                folder_data, query, workers=workers,
+                progress_callback=channel.progress, error_callback=channel.error,
+                control=control, stats=stats,
+                # Exports stream to disk; caching would keep every hit in memory
+                cache=result_cache if writer is None else None,
+            ):
+                if writer is not None:
+                    # Exported results go straight to disk, never into the pane
+                    writer.write(result)
+                else:
+                    channel.add_result(result)
         except Exception as e:
-            messagebox.showerror("Error", f"Error during search: {e}")
+            channel.error(f"Error during search: {e}")
         finally:
-            # Re-enable buttons after the search is complete
-            search_button.config(state=tk.NORMAL)
-            load_words_button.config(state=tk.NORMAL)
-            search_words_label.config(state=tk.NORMAL)
-            folder_button.config(state=tk.NORMAL)
-            search_words_entry.config(state=tk.NORMAL)
-
-            results_text.config(state=tk.DISABLED)
+            info = {"elapsed_time": time.time() - start_time}
+            if writer is not None:
+                try:
+                    writer.close()
+                except OSError as e:
+                    channel.error(f"Failed to write export file: {e}")
+                info["exported"] = writer.count
+            channel.close(**info)
 
     # Run the search in a separate thread
+    channel.start()
     threading.Thread(target=perform_search, daemon=True).start()
 
+def build_search_index():
+    """Build the on-disk search index for the selected folder."""
+    if not folder_data:
+        messagebox.showerror("Error", "No folder selected!")
+        return
+
+    index_button.config(state=tk.DISABLED)
+    search_button.config(state=tk.DISABLED)
+    export_button.config(state=tk.DISABLED)
+    folder_button.config(state=tk.DISABLED)
+    zip_button.config(state=tk.DISABLED)
+    progress_bar["value"] = 0
+
+    def update_progress(done, total):
+        progress_bar["value"] = (done / total) * 100 if total else 0
+        progress_label.config(text=f"Files Indexed: {done}/{total}")
+
+    def show_errors(errors):
+        messagebox.showerror("Error", "\n".join(errors))
+
+    def finish_build(info):
+        if "elapsed_time" in info:
+            results_label.config(text=f"Search index built in {info['elapsed_time']:.2f} seconds")
+        index_button.config(state=tk.NORMAL)
+        search_button.config(state=tk.NORMAL)
+        export_button.config(state=tk.NORMAL)
+        folder_button.config(state=tk.NORMAL)
+        zip_button.config(state=tk.NORMAL)
+
+    channel = UIChannel(root, on_progress=update_progress, on_error=show_errors, on_done=finish_build)
+
+    def perform_build():
+        """Build the index in a separate thread to avoid blocking the UI."""
+        try:
+            start_time = time.time()
+            search_index.build_index(folder_data, channel.progress)
+            # Built from the new index's words, so this takes a moment
+            fuzzy_index.build_vocabulary_index(folder_data)
+            thread_index.build_thread_indexes(folder_data)
+            channel.close(elapsed_time=time.time() - start_time)
+        except Exception as e:
+            channel.error(f"Error building index: {e}")
+            channel.close()
+
+    channel.start()
+    threading.Thread(target=perform_build, daemon=True).start()
+
 def on_file_path_click(event):
     """Trigger display_slack_chat when file path is clicked."""
     try:
-        widget = event.widget
-        index = widget.index(f"@{event.x},{event.y}")
-        line = widget.get(index + " linestart", index + " lineend")
-        match = re.search(r"File Path: (.+)", line)
-        if match:
-            file_path = match.group(1)
-            display_slack_chat(file_path)  # Call display_slack_chat with the file path
+        hit = results_pane.row_at(event.x, event.y)
+        if hit and hit[1]:
+            store = results_pane.store
+            file_path = store.file_path(hit[0])
+            # Opens at the clicked result, with the channel's other results a click away
+            display_slack_chat(file_path, store.ts(hit[0]), store.locations(os.path.dirname(file_path)))
         else:
             messagebox.showerror("Error", "No valid file path clicked.")
     except Exception as e:
@@ -519,11 +1032,10 @@ def on_hover(event):
     """Change the mouse cursor to a hand when hovering over file paths."""
     widget = event.widget
     try:
-        index = widget.index(f"@{event.x},{event.y}")
-        line = widget.get(index + " linestart", index + " lineend")
+        hit = results_pane.row_at(event.x, event.y)
         
-        # Check if the line contains 'File Path:'
-        if "File Path:" in line:
+        # Check if the line is a row's 'File Path:' line
+        if hit and hit[1]:
             widget.config(cursor="hand2")  # Set cursor to hand pointer
         else:
             widget.config(cursor="")  # Reset cursor if not on file path
@@ -540,120 +1052,184 @@ def open_html_file():
         messagebox.showerror("Error", f"main.html not found in:\n{script_dir}")
 
 # Main Application
-root = tk.Tk()
-set_app_icon(root)
-
-# Load the icon using the resource_path function
-root.title("CrawlSpace - Slack Audit Engine V1.1.0")
-root.geometry("900x700")
-
-
-# Lock the window size (disable resizing)
-root.resizable(False, False)
-
-# Global variables
-folder_data = None
-total_files = 0
-
-# Frame for organizing widgets
-frame = ttk.Frame(root, padding="10", relief="solid", borderwidth=2)
-frame.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
-root.grid_columnconfigure(0, weight=1)
-frame.grid_columnconfigure(0, weight=1)
-
-
-# UI Frame
-ui_frame = ttk.Frame(frame, padding="10", relief="solid", borderwidth=2)
-ui_frame.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
-ui_frame.columnconfigure(0, minsize=150)
-ui_frame.columnconfigure(1, minsize=400, weight=1)
-ui_frame.columnconfigure(2, minsize=150)
-
-# ROW 0
-# Load Folder Button and Labels
-folder_button = ttk.Button(ui_frame, text="Select Folder", command=load_folder)
-folder_button.grid(row=0, column=0, pady=5, padx=5, sticky=(tk.N, tk.W))
-
-folder_label = ttk.Label(ui_frame, text="Folder: None selected", font=("Arial", 10), relief="solid", borderwidth=2, width=75)
-folder_label.grid(row=0, column=1, pady=5, sticky=tk.W, columnspan=2)
-
-# Add a clickable label in the top-right corner to open the HTML file
-html_link = ttk.Button(ui_frame, text="Open Conversation Viewer")
-html_link.grid(row=0, column=2, pady=5, padx=5, sticky=tk.E)
-html_link.bind("<Button-1>", lambda e: open_html_file())
-
-# ROW 1
-
-# Load Search Words Button
-load_words_button = ttk.Button(ui_frame, text="Load Search Words", command=load_search_words)
-load_words_button.grid(row=1, column=0, pady=5, padx=5, sticky=(tk.N, tk.W))
-
-search_words_entry = tk.Text(ui_frame, wrap=tk.WORD, height=10, width=40, relief="solid", borderwidth=2)
-search_words_entry.grid(row=1, column=1, rowspan=3, sticky=tk.W, pady=5)
-
-# Row 2
-
-# Search Button
-search_button = ttk.Button(ui_frame, text="Search", command=search_words)
-search_button.grid(row=4, column=0, pady=5, sticky=(tk.N, tk.W))
-
-# Row 3
-
-# Row 4
-
-
-# Search Words Entry
-search_words_label = ttk.Label(ui_frame, text="(Click Here for citeria)")
-search_words_label.grid(row=4, column=1, pady=5, sticky=(tk.N,tk.W, tk.E))
-search_words_label.bind("<Button-1>", lambda e: show_search_criteria_info())  # Open info window on click
-
-
-
-
-# Results Frame
-results_frame = ttk.Frame(frame, padding="10", relief="solid", borderwidth=2)
-results_frame.grid(row=1, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
-results_frame.columnconfigure(0, minsize=150)
-results_frame.columnconfigure(1, minsize=400, weight=1)
-results_frame.columnconfigure(2, minsize=150)
-
-
-# Row 0
-# Results Text Widget with Scrollbar
-results_content = ttk.Frame(results_frame)  # Frame to hold the text widget and scrollbar
-results_content.grid(row=0, column=0, columnspan=4, pady=5, sticky=(tk.W, tk.E))
-
-results_scrollbar = ttk.Scrollbar(results_content, orient="vertical")
-results_text = tk.Text(results_content, wrap=tk.WORD, height=15, yscrollcommand=results_scrollbar.set, relief="solid", borderwidth=2)
-results_scrollbar.config(command=results_text.yview)
-
-results_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-results_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-results_text.config(state=tk.DISABLED)
-
-# Bind click events to the results text widget
-results_text.bind("<Button-1>", on_file_path_click)
-results_text.bind("<Motion>", on_hover)  # When mouse moves over the widget
-
-
-# Row 1
-# Add a progress label to show file count (moved to row 8)
-progress_label = ttk.Label(results_frame, text="Files Scanned: 0/0", font=("Arial", 10))
-progress_label.grid(row=1, column=0, pady=5, sticky=tk.W)
-
-# Progress Bar
-progress_bar = ttk.Progressbar(results_frame, orient="horizontal", length=400, mode="determinate")
-progress_bar.grid(row=1, column=1, pady=10, columnspan=1)
-
-# Total file count loaded
-file_count_label = ttk.Label(results_frame, text=f"Total JSON Files: {total_files}", font=("Arial", 10))
-file_count_label.grid(row=1, column=2, pady=5, sticky=tk.E)
-
-# Row 2
-# Results Count Label
-results_label = ttk.Label(results_frame, text="", font=("Arial", 10, "bold"), foreground="blue")
-results_label.grid(row=2, column=1, pady=5)
-
-
-root.mainloop()
+if __name__ == "__main__":
+    # Needed for the search process pool in PyInstaller builds
+    multiprocessing.freeze_support()
+
+    root = tk.Tk()
+    set_app_icon(root)
+
+    # Load the icon using the resource_path function
+    root.title("CrawlSpace - Slack Audit Engine V1.1.0")
+    root.geometry("900x700")
+
+
+    # Lock the window size (disable resizing)
+    root.resizable(False, False)
+
+    # Global variables
+    folder_data = None
+    total_files = 0
+    last_search_stats = None
+    # Results of recent searches, for repeated and narrowed queries
+    result_cache = query_cache.QueryCache()
+
+    # Frame for organizing widgets
+    frame = ttk.Frame(root, padding="10", relief="solid", borderwidth=2)
+    frame.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
+    root.grid_columnconfigure(0, weight=1)
+    frame.grid_columnconfigure(0, weight=1)
+
+
+    # UI Frame
+    ui_frame = ttk.Frame(frame, padding="10", relief="solid", borderwidth=2)
+    ui_frame.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
+    ui_frame.columnconfigure(0, minsize=150)
+    ui_frame.columnconfigure(1, minsize=400, weight=1)
+    ui_frame.columnconfigure(2, minsize=150)
+
+    # ROW 0
+    # Load Folder Button and Labels
+    # A Slack export can be an extracted folder or the .zip itself
+    export_frame = ttk.Frame(ui_frame)
+    export_frame.grid(row=0, column=0, pady=5, padx=5, sticky=(tk.N, tk.W))
+    folder_button = ttk.Button(export_frame, text="Select Folder", command=load_folder)
+    folder_button.pack(side=tk.LEFT)
+    zip_button = ttk.Button(export_frame, text="Open Zip", command=load_zip)
+    zip_button.pack(side=tk.LEFT, padx=(5, 0))
+
+    folder_label = ttk.Label(ui_frame, text="Folder: None selected", font=("Arial", 10), relief="solid", borderwidth=2, width=75)
+    folder_label.grid(row=0, column=1, pady=5, sticky=tk.W, columnspan=2)
+
+    # Add a clickable label in the top-right corner to open the HTML file
+    html_link = ttk.Button(ui_frame, text="Open Conversation Viewer")
+    html_link.grid(row=0, column=2, pady=5, padx=5, sticky=tk.E)
+    html_link.bind("<Button-1>", lambda e: open_html_file())
+
+    # ROW 1
+
+    # Load Search Words Button
+    load_words_button = ttk.Button(ui_frame, text="Load Search Words", command=load_search_words)
+    load_words_button.grid(row=1, column=0, pady=5, padx=5, sticky=(tk.N, tk.W))
+
+    search_words_entry = tk.Text(ui_frame, wrap=tk.WORD, height=10, width=40, relief="solid", borderwidth=2)
+    search_words_entry.grid(row=1, column=1, rowspan=3, sticky=tk.W, pady=5)
+
+    # Row 2
+
+    # Search Button
+    search_frame = ttk.Frame(ui_frame)
+    search_frame.grid(row=4, column=0, pady=5, sticky=(tk.N, tk.W))
+    search_button = ttk.Button(search_frame, text="Search", command=search_words)
+    search_button.pack(side=tk.LEFT)
+
+    # Export Button (streams results to CSV/JSONL instead of the results pane)
+    export_button = ttk.Button(search_frame, text="Export Results", command=export_results)
+    export_button.pack(side=tk.LEFT, padx=(5, 0))
+
+    # Row 3
+
+    # Build Index Button
+    index_button = ttk.Button(ui_frame, text="Build Index", command=build_search_index)
+    index_button.grid(row=3, column=0, pady=5, sticky=(tk.N, tk.W))
+
+    # Worker processes used for searching
+    workers_frame = ttk.Frame(ui_frame)
+    workers_frame.grid(row=2, column=0, pady=5, padx=5, sticky=(tk.N, tk.W))
+    ttk.Label(workers_frame, text="Workers:").pack(side=tk.LEFT)
+    workers_spinbox = ttk.Spinbox(workers_frame, from_=1, to=64, width=4)
+    workers_spinbox.set(search_engine.default_workers())
+    workers_spinbox.pack(side=tk.LEFT)
+
+    # Search limits
+    limits_frame = ttk.Frame(ui_frame)
+    limits_frame.grid(row=1, column=2, pady=5, padx=5, sticky=(tk.N, tk.E))
+    ttk.Label(limits_frame, text="Max Results:").grid(row=0, column=0, sticky=tk.W)
+    max_results_entry = ttk.Entry(limits_frame, width=8)
+    max_results_entry.grid(row=0, column=1, pady=2)
+    ttk.Label(limits_frame, text="Time Limit (s):").grid(row=1, column=0, sticky=tk.W)
+    time_limit_entry = ttk.Entry(limits_frame, width=8)
+    time_limit_entry.grid(row=1, column=1, pady=2)
+
+    # Typo-tolerant search
+    fuzzy_var = tk.BooleanVar(value=False)
+    fuzzy_check = ttk.Checkbutton(ui_frame, text="Fuzzy (match typos)", variable=fuzzy_var)
+    fuzzy_check.grid(row=2, column=2, pady=5, padx=5, sticky=(tk.N, tk.E))
+
+    # Search diagnostics (per-phase timings)
+    diagnostics_frame = ttk.Frame(ui_frame)
+    diagnostics_frame.grid(row=3, column=2, pady=5, padx=5, sticky=(tk.N, tk.E))
+    diagnostics_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(diagnostics_frame, text="Diagnostics", variable=diagnostics_var).pack(side=tk.LEFT)
+    diagnostics_button = ttk.Button(diagnostics_frame, text="View", width=6, command=show_diagnostics)
+    diagnostics_button.pack(side=tk.LEFT, padx=(5, 0))
+
+    # Stop Button (enabled while a search is running)
+    stop_button = ttk.Button(ui_frame, text="Stop", state=tk.DISABLED)
+    stop_button.grid(row=4, column=2, pady=5, padx=5, sticky=(tk.N, tk.E))
+
+    # Row 5: filters applied before any file is opened
+    filters_frame = ttk.Frame(ui_frame)
+    filters_frame.grid(row=5, column=0, columnspan=3, pady=5, padx=5, sticky=(tk.N, tk.W))
+    ttk.Label(filters_frame, text="Channels:").pack(side=tk.LEFT)
+    channels_entry = ttk.Entry(filters_frame, width=18)
+    channels_entry.pack(side=tk.LEFT, padx=(2, 10))
+    ttk.Label(filters_frame, text="Users:").pack(side=tk.LEFT)
+    users_entry = ttk.Entry(filters_frame, width=18)
+    users_entry.pack(side=tk.LEFT, padx=(2, 10))
+    ttk.Label(filters_frame, text="From:").pack(side=tk.LEFT)
+    date_from_entry = ttk.Entry(filters_frame, width=11)
+    date_from_entry.pack(side=tk.LEFT, padx=(2, 10))
+    ttk.Label(filters_frame, text="To:").pack(side=tk.LEFT)
+    date_to_entry = ttk.Entry(filters_frame, width=11)
+    date_to_entry.pack(side=tk.LEFT, padx=2)
+    ttk.Label(filters_frame, text="(comma-separated; dates YYYY-MM-DD)").pack(side=tk.LEFT, padx=(10, 0))
+
+    # Search Words Entry
+    search_words_label = ttk.Label(ui_frame, text="(Click Here for citeria)")
+    search_words_label.grid(row=4, column=1, pady=5, sticky=(tk.N,tk.W, tk.E))
+    search_words_label.bind("<Button-1>", lambda e: show_search_criteria_info())  # Open info window on click
+
+
+
+
+    # Results Frame
+    results_frame = ttk.Frame(frame, padding="10", relief="solid", borderwidth=2)
+    results_frame.grid(row=1, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
+    results_frame.columnconfigure(0, minsize=150)
+    results_frame.columnconfigure(1, minsize=400, weight=1)
+    results_frame.columnconfigure(2, minsize=150)
+
+
+    # Row 0
+    # Results Text Widget with Scrollbar
+    # Only one page of results is rendered at a time; see results_view.py
+    results_pane = ResultsPane(results_frame)
+    results_pane.frame.grid(row=0, column=0, columnspan=4, pady=5, sticky=(tk.W, tk.E))
+    results_text = results_pane.text
+
+    # Bind click events to the results text widget
+    results_text.bind("<Button-1>", on_file_path_click)
+    results_text.bind("<Motion>", on_hover)  # When mouse moves over the widget
+
+
+    # Row 1
+    # Add a progress label to show file count (moved to row 8)
+    progress_label = ttk.Label(results_frame, text="Files Scanned: 0/0", font=("Arial", 10))
+    progress_label.grid(row=1, column=0, pady=5, sticky=tk.W)
+
+    # Progress Bar
+    progress_bar = ttk.Progressbar(results_frame, orient="horizontal", length=400, mode="determinate")
+    progress_bar.grid(row=1, column=1, pady=10, columnspan=1)
+
+    # Total file count loaded
+    file_count_label = ttk.Label(results_frame, text=f"Total JSON Files: {total_files}", font=("Arial", 10))
+    file_count_label.grid(row=1, column=2, pady=5, sticky=tk.E)
+
+    # Row 2
+    # Results Count Label
+    results_label = ttk.Label(results_frame, text="", font=("Arial", 10, "bold"), foreground="blue")
+    results_label.grid(row=2, column=1, pady=5)
+
+
+    root.mainloop()
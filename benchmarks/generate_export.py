@@ -0,0 +1,173 @@
+"""Generate a synthetic Slack export for benchmarking CrawlSpace.
+
+The layout matches a real export: users.json and channels.json at the root and
+one folder per channel holding a <YYYY-MM-DD>.json file per day. Messages mix
+plain text, rich_text blocks, thread replies, file uploads, attachments, and
+edited and deleted messages (with their "original").
+
+    python benchmarks/generate_export.py OUT_FOLDER --channels 20 --days 90 --messages 200
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+WORDS = (
+    "the a to and of in is for on that it with as we this be are at by from "
+    "report budget meeting deadline review client project update schedule call "
+    "invoice contract numbers quarter forecast launch draft approve send share "
+    "please thanks today tomorrow monday friday team office customer vendor "
+    "email phone document slide deck plan risk issue fix deploy release build"
+).split()
+
+# Words the benchmark searches for, with how often (per message) they appear
+NEEDLES = {
+    "password": 0.004,
+    "confidential": 0.003,
+    "merger": 0.002,
+    "offshore": 0.001,
+}
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Lee", "Patel", "Garcia", "Smith", "Nguyen", "Kim", "Brown", "Lopez", "Chen", "Walker"]
+
+
+def make_users(rng, count):
+    users = []
+    for i in range(count):
+        real_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        users.append({
+            "id": f"U{i:08d}",
+            "name": real_name.lower().replace(" ", "."),
+            "real_name": real_name,
+            "profile": {"real_name": real_name, "display_name": real_name.split()[0]},
+        })
+    return users
+
+
+def make_sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+    for needle, rate in NEEDLES.items():
+        if rng.random() < rate * 3:
+            words.insert(rng.randrange(len(words) + 1), needle)
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + rng.choice([".", ".", ".", "?", "!"])
+
+
+def make_text(rng):
+    return " ".join(make_sentence(rng) for _ in range(rng.randint(1, 3)))
+
+
+def rich_text_blocks(text):
+    return [{
+        "type": "rich_text",
+        "block_id": "b1",
+        "elements": [{
+            "type": "rich_text_section",
+            "elements": [{"type": "text", "text": text}],
+        }],
+    }]
+
+
+def make_message(rng, user, ts, thread_parents):
+    text = make_text(rng)
+    message = {
+        "type": "message",
+        "user": user["id"],
+        "text": text,
+        "ts": ts,
+        "user_profile": {"real_name": user["real_name"], "display_name": user["profile"]["display_name"]},
+    }
+
+    roll = rng.random()
+    if roll < 0.5:
+        message["blocks"] = rich_text_blocks(text)
+    if 0.5 <= roll < 0.53:
+        message["files"] = [{"id": f"F{rng.randrange(10**8):08d}", "name": f"{rng.choice(WORDS)}.pdf",
+                             "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)}"}]
+        message["text"] = ""
+        del message["user_profile"]
+    elif 0.53 <= roll < 0.56:
+        message["attachments"] = [{"fallback": make_sentence(rng), "title": make_sentence(rng),
+                                   "text": make_sentence(rng)}]
+
+    # Thread replies point back at an earlier message in the channel
+    if thread_parents and rng.random() < 0.15:
+        parent = rng.choice(thread_parents)
+        message["thread_ts"] = parent
+        message["parent_user_id"] = user["id"]
+    elif rng.random() < 0.05:
+        thread_parents.append(ts)
+        message["thread_ts"] = ts
+
+    roll = rng.random()
+    if roll < 0.02:
+        return {"type": "message", "subtype": "message_deleted", "hidden": True, "ts": ts,
+                "deleted_ts": ts, "original": message}
+    if roll < 0.04:
+        edited = dict(message, text=make_text(rng), edited={"user": user["id"], "ts": ts})
+        return {"type": "message", "subtype": "message_changed", "hidden": True, "ts": ts,
+                "message": edited, "original": message}
+    return message
+
+
+def generate_export(out_folder, channels=10, days=30, messages_per_day=100, users=50, seed=1,
+                    start_date="2023-01-01"):
+    """Write a synthetic export to out_folder and return (file count, message count)."""
+    rng = random.Random(seed)
+    os.makedirs(out_folder, exist_ok=True)
+
+    user_list = make_users(rng, users)
+    with open(os.path.join(out_folder, "users.json"), "w", encoding="utf-8") as f:
+        json.dump(user_list, f, indent=4)
+
+    channel_list = [{
+        "id": f"C{i:08d}",
+        "name": f"channel-{i}",
+        "created": 1600000000,
+        "members": [user["id"] for user in rng.sample(user_list, min(len(user_list), 8))],
+    } for i in range(channels)]
+    with open(os.path.join(out_folder, "channels.json"), "w", encoding="utf-8") as f:
+        json.dump(channel_list, f, indent=4)
+
+    start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    file_count = 0
+    message_count = 0
+    for channel in channel_list:
+        channel_folder = os.path.join(out_folder, channel["name"])
+        os.makedirs(channel_folder, exist_ok=True)
+        thread_parents = []
+        for day in range(days):
+            day_start = start + timedelta(days=day)
+            seconds = sorted(rng.sample(range(86400), min(86400, messages_per_day)))
+            messages = []
+            for second in seconds:
+                ts = f"{(day_start + timedelta(seconds=second)).timestamp():.0f}.{rng.randrange(10**6):06d}"
+                messages.append(make_message(rng, rng.choice(user_list), ts, thread_parents))
+            thread_parents = thread_parents[-50:]
+            with open(os.path.join(channel_folder, f"{day_start:%Y-%m-%d}.json"), "w", encoding="utf-8") as f:
+                json.dump(messages, f, indent=4)
+            file_count += 1
+            message_count += len(messages)
+    return file_count, message_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Slack export.")
+    parser.add_argument("out_folder")
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--messages", type=int, default=100, help="messages per channel per day")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--start-date", default="2023-01-01")
+    args = parser.parse_args(argv)
+
+    files, messages = generate_export(args.out_folder, args.channels, args.days, args.messages,
+                                      args.users, args.seed, args.start_date)
+    print(f"Wrote {files} day files with {messages} messages to {args.out_folder}")
+
+
+if __name__ == "__main__":
+    main()
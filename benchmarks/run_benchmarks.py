@@ -0,0 +1,213 @@
+"""Benchmark CrawlSpace's search and viewer hot paths on a synthetic export.
+
+    python benchmarks/run_benchmarks.py                       # generate + run
+    python benchmarks/run_benchmarks.py --save baseline.json  # store a baseline
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Each benchmark is run --repeat times and the fastest run is kept. With
+--compare, benchmarks more than --tolerance slower than the baseline are
+reported as regressions and the exit status is 1.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import json_stream  # noqa: E402
+import search_engine  # noqa: E402
+import search_index  # noqa: E402
+import search_query  # noqa: E402
+from generate_export import NEEDLES, generate_export  # noqa: E402
+from term_matcher import highlight  # noqa: E402
+
+QUERY = "\n".join(NEEDLES) + "\nbudget review"
+
+
+def timed(function, repeat):
+    """Return (best seconds, last return value) over repeat runs."""
+    best = None
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def load_gui_module():
+    """Import the GUI script (its window is only built under __main__)."""
+    script = os.path.join(REPO_ROOT, "Crawlspace-v1.1.py")
+    spec = importlib.util.spec_from_file_location("crawlspace_gui", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.folder_data = None
+    return module
+
+
+def bench_display_chat(file_path, repeat):
+    """Time opening a chat file in the viewer, or None if there is no display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Skipping display_chat benchmark: {e}")
+        return None
+    root.withdraw()
+    gui = load_gui_module()
+
+    def open_viewer():
+        gui.display_slack_chat(file_path)
+        root.update()
+        for window in root.winfo_children():
+            window.destroy()
+
+    try:
+        return timed(open_viewer, repeat)[0]
+    finally:
+        root.destroy()
+
+
+def run_benchmarks(folder_path, repeat, workers):
+    results = {}
+
+    seconds, json_files = timed(lambda: search_index.list_json_files(folder_path), repeat)
+    results["enumerate_files"] = seconds
+    total_bytes = sum(os.path.getsize(path) for path in json_files)
+
+    def parse_all():
+        # Items are dropped as they go, like a search does
+        return sum(1 for path in json_files for _ in json_stream.iter_items(path))
+
+    results["parse_json"] = timed(parse_all, repeat)[0]
+    messages = [item for path in json_files for item in json_stream.iter_items(path)]
+
+    # The same parse with every installed JSON backend
+    default_backend = json_stream.backend
+    try:
+        for backend in json_stream.BACKENDS:
+            json_stream.set_backend(backend)
+            results[f"parse_json_{backend}"] = timed(parse_all, repeat)[0]
+    finally:
+        json_stream.set_backend(default_backend)
+    texts = [message["text"] for message in messages
+             if isinstance(message, dict) and isinstance(message.get("text"), str)]
+
+    query = search_query.parse(QUERY)
+    seconds, matches = timed(lambda: [m for text in texts for m in query.match_sentences(text)], repeat)
+    results["match_sentences"] = seconds
+
+    seconds, _ = timed(lambda: [highlight(sentence, spans) for sentence, spans in matches], repeat)
+    results["highlight"] = seconds
+
+    def scan_all():
+        hits = []
+        for message in messages:
+            if isinstance(message, dict):
+                search_engine.scan_dict(message, "", query, hits)
+        return hits
+
+    seconds, _ = timed(scan_all, repeat)
+    results["scan_dict"] = seconds
+
+    seconds, hits = timed(lambda: search_engine.search_folder(folder_path, QUERY, workers=1), repeat)
+    results["search_serial"] = seconds
+    if workers > 1:
+        results[f"search_{workers}_workers"] = timed(
+            lambda: search_engine.search_folder(folder_path, QUERY, workers=workers), repeat)[0]
+
+    results["build_index"] = timed(lambda: search_index.build_index(folder_path), 1)[0]
+    results["search_indexed"] = timed(
+        lambda: search_engine.search_folder(folder_path, QUERY, workers=1), repeat)[0]
+
+    largest = max(json_files, key=os.path.getsize)
+    display_seconds = bench_display_chat(largest, repeat)
+    if display_seconds is not None:
+        results["display_chat"] = display_seconds
+
+    info = {
+        "files": len(json_files),
+        "bytes": total_bytes,
+        "messages": len(messages),
+        "hits": len(hits),
+        "json_backend": json_stream.backend,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    return results, info
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the names of regressed benchmarks."""
+    regressions = []
+    print(f"\n{'benchmark':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<22}{'-':>12}{seconds:>12.4f}{'new':>10}")
+            continue
+        change = (seconds - base) / base if base else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<22}{base:>12.4f}{seconds:>12.4f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CrawlSpace search and viewer.")
+    parser.add_argument("--folder", help="existing export folder to benchmark (default: generate one); "
+                        "it is copied to a temporary folder first, so its index is left alone")
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--messages", type=int, default=200, help="messages per channel per day")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=search_engine.default_workers())
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="slowdown (fraction) tolerated before flagging a regression")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder_path = os.path.join(tmp, "export")
+        if args.folder:
+            # The index benchmarks write .crawlspace into the export; keep the user's own untouched
+            shutil.copytree(args.folder, folder_path, ignore=shutil.ignore_patterns(".crawlspace"))
+        else:
+            files, messages = generate_export(folder_path, args.channels, args.days, args.messages)
+            print(f"Generated {files} day files with {messages} messages")
+        results, info = run_benchmarks(folder_path, args.repeat, args.workers)
+
+    print(f"{info['files']} files, {info['bytes'] / 1e6:.1f} MB, {info['messages']} messages, {info['hits']} hits, "
+          f"JSON backend: {info['json_backend']}")
+    for name, seconds in results.items():
+        print(f"{name:<22}{seconds:>10.4f} s")
+    if "parse_json" in results:
+        print(f"parse throughput: {info['bytes'] / 1e6 / results['parse_json']:.1f} MB/s, "
+              f"{info['messages'] / results['parse_json']:.0f} messages/s")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "info": info}, f, indent=4)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
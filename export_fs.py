@@ -0,0 +1,195 @@
+"""File access for Slack exports that may still be zipped.
+
+Slack hands out exports as a single .zip. Rather than extracting it, a zip
+export is addressed as if it were a folder: the member
+``general/2023-01-01.json`` of ``/audits/acme.zip`` has the path
+``/audits/acme.zip/general/2023-01-01.json``. The helpers here accept plain
+paths and member paths alike, so the search, the index and the chat viewer
+don't need to know which one they were given.
+
+Open archives are cached per process. Search workers each open their own
+copy, so members are decompressed in parallel across the pool.
+"""
+import os
+import re
+import threading
+import zipfile
+import zlib
+
+ARCHIVE_EXTENSION = ".zip"
+# Errors a damaged archive member raises while being read
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError)
+
+_MEMBER_RE = re.compile(r"\.zip[\\/]", re.IGNORECASE)
+# Archive path -> _Archive
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+class _Archive:
+    """An open zip file and its members, keyed by member name."""
+
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.signature = (stat.st_size, stat.st_mtime_ns)
+        self.zip_file = zipfile.ZipFile(path)
+        self.members = {}
+        self.folders = set()
+        for info in self.zip_file.infolist():
+            name = info.filename
+            # Skip folders and the resource forks macOS adds when zipping
+            if info.is_dir() or name.startswith("__MACOSX/"):
+                continue
+            self.members[name] = info
+            parts = name.split("/")[:-1]
+            for depth in range(1, len(parts) + 1):
+                self.folders.add("/".join(parts[:depth]))
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSION) and os.path.isfile(path)
+
+
+def split_archive(path):
+    """Return (archive path, member name) for a path in a zip, else (None, path).
+
+    The member name is "" for the archive itself.
+    """
+    for match in _MEMBER_RE.finditer(path):
+        archive = path[:match.start() + len(ARCHIVE_EXTENSION)]
+        if archive in _archives or os.path.isfile(archive):
+            return archive, path[match.end():].replace("\\", "/").strip("/")
+    if is_archive(path):
+        return path, ""
+    return None, path
+
+
+def _open_archive(archive_path):
+    key = os.path.abspath(archive_path)
+    with _archives_lock:
+        archive = _archives.get(key)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            _archives.pop(key, None)
+            raise
+        if archive is None or archive.signature != (stat.st_size, stat.st_mtime_ns):
+            if archive is not None:
+                archive.zip_file.close()
+            archive = _archives[key] = _Archive(key)
+        return archive
+
+
+def _member(path):
+    """Return (archive, ZipInfo) for a member path, raising FileNotFoundError if missing."""
+    archive_path, name = split_archive(path)
+    archive = _open_archive(archive_path)
+    info = archive.members.get(name)
+    if info is None:
+        raise FileNotFoundError(f"No such file in archive: {path}")
+    return archive, info
+
+
+def exists(path):
+    archive_path, name = split_archive(path)
+    if archive_path is None:
+        return os.path.exists(path)
+    try:
+        archive = _open_archive(archive_path)
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return not name or name in archive.members or name in archive.folders
+
+
+def isdir(path):
+    """True for folders, zip exports and folders inside a zip export."""
+    archive_path, name = split_archive(path)
+    if archive_path is None:
+        return os.path.isdir(path)
+    try:
+        archive = _open_archive(archive_path)
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return not name or name in archive.folders
+
+
+def getsize(path):
+    """Size of a file; for archive members, the uncompressed size."""
+    archive_path, _ = split_archive(path)
+    if archive_path is None:
+        return os.path.getsize(path)
+    return _member(path)[1].file_size
+
+
+def signature(path):
+    """Return a (size, version) pair that changes whenever the file does."""
+    archive_path, _ = split_archive(path)
+    if archive_path is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    info = _member(path)[1]
+    return info.file_size, info.CRC
+
+
+def open_binary(path):
+    """Open a file or archive member for reading bytes."""
+    archive_path, _ = split_archive(path)
+    if archive_path is None:
+        return open(path, "rb")
+    archive, info = _member(path)
+    return archive.zip_file.open(info)
+
+
+def read_bytes(path):
+    """Read a whole file or archive member with one bulk read."""
+    with open_binary(path) as f:
+        return f.read()
+
+
+def export_root(path):
+    """Return the folder of a zip export that holds its users.json/channels.json.
+
+    Some zips wrap the whole export in a single top-level folder; for those
+    the member folder is returned. Other paths are returned unchanged.
+    """
+    archive_path, name = split_archive(path)
+    if archive_path is None or name:
+        return path
+    archive = _open_archive(archive_path)
+    if "users.json" in archive.members or "channels.json" in archive.members:
+        return path
+    top_folders = {folder for folder in archive.folders if "/" not in folder}
+    if len(top_folders) == 1:
+        folder = top_folders.pop()
+        if f"{folder}/users.json" in archive.members or f"{folder}/channels.json" in archive.members:
+            return os.path.join(path, folder)
+    return path
+
+
+def _walk_key(name):
+    # Same order as os.walk with sorted names: a folder's files, then its subfolders
+    parts = name.split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def list_files(folder_path, extension, skip_dirs=()):
+    """Return the files under folder_path ending in extension, in os.walk order."""
+    archive_path, prefix = split_archive(folder_path)
+    if archive_path is None:
+        paths = []
+        for dirpath, dirnames, files in os.walk(folder_path):
+            dirnames[:] = sorted(d for d in dirnames if d not in skip_dirs)
+            for file in sorted(files):
+                if file.endswith(extension):
+                    paths.append(os.path.join(dirpath, file))
+        return paths
+
+    archive = _open_archive(archive_path)
+    names = []
+    for name in archive.members:
+        if prefix and not name.startswith(prefix + "/"):
+            continue
+        if not name.endswith(extension) or any(part in skip_dirs for part in name.split("/")[:-1]):
+            continue
+        names.append(name[len(prefix) + 1:] if prefix else name)
+    return [os.path.join(folder_path, *name.split("/")) for name in sorted(names, key=_walk_key)]
@@ -0,0 +1,224 @@
+"""Typo-tolerant search: find the words of an export close to a query word.
+
+The export's vocabulary (every word token of its searchable text, as
+search_index.tokenize splits it) is stored with a character-trigram index
+in ``.crawlspace/vocab.bin``. A vocabulary word within edit distance d of a
+query word shares all but at most 4 * d of its trigrams, so only words that
+share enough trigrams are ever compared letter by letter. Fuzzy search then
+looks for those words as well (see search_query.Query.expand).
+
+The vocabulary comes straight from the search index when that is current, so
+building it adds little to Build Index; otherwise the export is read once.
+It is rebuilt whenever a chat file changes.
+"""
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+import export_fs
+import json_stream
+import search_index
+from message_fields import DEFAULT_PLAN
+
+log = logging.getLogger(__name__)
+
+VOCAB_FILE = "vocab.bin"
+VOCAB_MAGIC = b"CSVOC001"
+VOCAB_VERSION = 1
+# Similar words looked for per query word, closest first
+MAX_EXPANSIONS = 50
+
+_HEADER = struct.Struct("<8sQQ")
+
+
+def default_distance(word):
+    """Edits tolerated in a word: none up to 3 letters, one up to 7, else two."""
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 7 else 2
+
+
+def trigrams(word):
+    """Return the set of character trigrams of word, padded to mark its start and end."""
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Return the edit distance of a and b (a swap of two neighbours counts as one), or limit + 1 above limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def collect_vocabulary(folder_path, json_files):
+    """Return every word token of the export, from its search index if that is current."""
+    index = search_index.load_index(folder_path)
+    if index is not None and index.covers(json_files):
+        return set(index.terms)
+    words = set()
+    for file_path in json_files:
+        try:
+            for item in json_stream.iter_items(file_path):
+                if isinstance(item, dict):
+                    for _source, text in DEFAULT_PLAN.extract(item):
+                        words.update(search_index.tokenize(text))
+        except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+            log.warning("Skipping %s while collecting words: %s", file_path, e)
+    return words
+
+
+def build_vocabulary_index(folder_path, json_files=None):
+    """Build the vocabulary index of an export, save it and return it."""
+    if json_files is None:
+        json_files = search_index.list_json_files(folder_path)
+    fingerprint = search_index.export_fingerprint(folder_path, json_files)
+    vocabulary = VocabularyIndex.build(collect_vocabulary(folder_path, json_files), fingerprint)
+    try:
+        vocabulary.save(search_index.data_path(folder_path, VOCAB_FILE))
+    except OSError as e:
+        # Still usable for this search; it is just rebuilt next time
+        log.warning("Error saving vocabulary index: %s", e)
+    return vocabulary
+
+
+def load_vocabulary_index(folder_path, json_files=None):
+    """Return the export's vocabulary index, building it if it is missing or out of date."""
+    if json_files is None:
+        json_files = search_index.list_json_files(folder_path)
+    fingerprint = search_index.export_fingerprint(folder_path, json_files)
+    vocabulary = VocabularyIndex.load(search_index.data_path(folder_path, VOCAB_FILE))
+    if vocabulary is not None and vocabulary.fingerprint == fingerprint:
+        return vocabulary
+    return build_vocabulary_index(folder_path, json_files)
+
+
+class VocabularyIndex:
+    """Sorted vocabulary words and, for each trigram, the ids of the words containing it."""
+
+    def __init__(self, words, trigram_spans, word_ids, fingerprint):
+        self.words = words
+        self.fingerprint = fingerprint
+        # trigram -> (offset, count) into word_ids
+        self._trigram_spans = trigram_spans
+        self._word_ids = word_ids
+        self._lengths = None
+
+    @classmethod
+    def build(cls, vocabulary, fingerprint):
+        words = sorted(vocabulary)
+        postings = {}
+        for word_id, word in enumerate(words):
+            for gram in trigrams(word):
+                postings.setdefault(gram, []).append(word_id)
+        trigram_spans = {}
+        word_ids = array("I")
+        for gram in sorted(postings):
+            trigram_spans[gram] = (len(word_ids), len(postings[gram]))
+            word_ids.extend(postings[gram])
+        return cls(words, trigram_spans, word_ids, fingerprint)
+
+    def save(self, path):
+        meta = zlib.compress(json.dumps({
+            "version": VOCAB_VERSION,
+            "fingerprint": self.fingerprint,
+            "words": self.words,
+            "trigrams": self._trigram_spans,
+        }, separators=(",", ":")).encode("utf-8"))
+        word_ids = array("I", self._word_ids)
+        if sys.byteorder == "big":
+            word_ids.byteswap()
+        ids_blob = zlib.compress(word_ids.tobytes())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as vocab_file:
+            vocab_file.write(_HEADER.pack(VOCAB_MAGIC, len(meta), len(ids_blob)))
+            vocab_file.write(meta)
+            vocab_file.write(ids_blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved vocabulary index, or return None if there isn't a usable one."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as vocab_file:
+                magic, meta_len, ids_len = _HEADER.unpack(vocab_file.read(_HEADER.size))
+                if magic != VOCAB_MAGIC:
+                    return None
+                meta = json.loads(zlib.decompress(vocab_file.read(meta_len)))
+                word_ids = array("I")
+                word_ids.frombytes(zlib.decompress(vocab_file.read(ids_len)))
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            log.warning("Error loading vocabulary index: %s", e)
+            return None
+        if meta.get("version") != VOCAB_VERSION:
+            return None
+        if sys.byteorder == "big":
+            word_ids.byteswap()
+        trigram_spans = {gram: tuple(span) for gram, span in meta["trigrams"].items()}
+        return cls(meta["words"], trigram_spans, word_ids, meta["fingerprint"])
+
+    def _candidates(self, word, max_distance):
+        grams = trigrams(word)
+        threshold = len(grams) - 4 * max_distance
+        if threshold <= 0:
+            # Too short for trigrams to rule anything out; compare words of a similar length
+            if self._lengths is None:
+                self._lengths = {}
+                for candidate in self.words:
+                    self._lengths.setdefault(len(candidate), []).append(candidate)
+            return [candidate for length in range(len(word) - max_distance, len(word) + max_distance + 1)
+                    for candidate in self._lengths.get(length, ())]
+        counts = {}
+        for gram in grams:
+            span = self._trigram_spans.get(gram)
+            if span is None:
+                continue
+            offset, count = span
+            for word_id in self._word_ids[offset:offset + count]:
+                counts[word_id] = counts.get(word_id, 0) + 1
+        return [self.words[word_id] for word_id, shared in counts.items() if shared >= threshold]
+
+    def similar(self, word, max_distance=None):
+        """Return up to MAX_EXPANSIONS (distance, vocabulary word) pairs near word, closest first.
+
+        max_distance defaults to default_distance(word). word itself is not included.
+        """
+        word = word.lower()
+        if max_distance is None:
+            max_distance = default_distance(word)
+        if max_distance <= 0:
+            return []
+        similar = []
+        letters = set(word)
+        for candidate in self._candidates(word, max_distance):
+            if candidate == word:
+                continue
+            # Each edit adds or removes at most one distinct letter: a cheap check before the full comparison
+            if len(letters.difference(candidate)) > max_distance or len(set(candidate) - letters) > max_distance:
+                continue
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                similar.append((distance, candidate))
+        similar.sort()
+        return similar[:MAX_EXPANSIONS]
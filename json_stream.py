@@ -0,0 +1,266 @@
+"""JSON loading layer and incremental reader for Slack export files.
+
+Files are read as bytes in one bulk read and parsed with orjson when it is
+installed, falling back to the standard json module otherwise (set
+CRAWLSPACE_JSON_BACKEND=json to force the fallback). Export files are usually
+a top-level array of message objects. Large files are read in fixed-size
+chunks and their messages yielded one at a time, so memory use depends on the
+size of a message rather than the size of the file.
+"""
+import codecs
+import json
+import mmap
+import os
+import re
+import time
+
+import export_fs
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Files smaller than this are faster to read with a single bulk read
+STREAM_MIN_BYTES = 16 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Reading at least this many spans of one file goes through mmap
+MMAP_MIN_SPANS = 8
+
+BACKEND_ENV = "CRAWLSPACE_JSON_BACKEND"
+BACKENDS = ("orjson", "json") if orjson is not None else ("json",)
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+# What may still follow a value cut off at the end of the buffer ("-2." of "-2.5")
+_VALUE_TAIL_RE = re.compile(r"[0-9.eE+\-]*")
+
+
+def _utf8_len(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _json_loads(data):
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # The stdlib parser is more lenient (byte order marks, NaN, huge ints)
+        return _json_loads(data)
+
+
+loads = _json_loads
+backend = "json"
+
+
+def set_backend(name):
+    """Select the parser used by loads(): "orjson" or "json"."""
+    global loads, backend
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend not available: {name}")
+    loads = _orjson_loads if name == "orjson" else _json_loads
+    backend = name
+
+
+set_backend(os.environ.get(BACKEND_ENV) if os.environ.get(BACKEND_ENV) in BACKENDS else BACKENDS[0])
+
+
+def read_bytes(file_path):
+    """Read a whole file (or zip export member) with one bulk read."""
+    return export_fs.read_bytes(file_path)
+
+
+def load_file(file_path):
+    """Read and parse a whole JSON file."""
+    return loads(read_bytes(file_path))
+
+
+def load_spans(file_path, spans, stats=None):
+    """Parse the JSON values at the given (start, end) byte spans of a file.
+
+    Many spans are sliced out of a memory map; a few are read with seeks.
+    Zip export members can't be mapped or seeked cheaply, so they are
+    decompressed once and sliced.
+    """
+    values = []
+    if not spans:
+        return values
+    if export_fs.split_archive(file_path)[0] is not None:
+        if stats is not None:
+            with stats.timer("read"):
+                data = memoryview(read_bytes(file_path))
+        else:
+            data = memoryview(read_bytes(file_path))
+        for start, end in spans:
+            if stats is not None:
+                with stats.timer("parse"):
+                    values.append(loads(data[start:end]))
+            else:
+                values.append(loads(data[start:end]))
+        return values
+    with open(file_path, "rb") as f:
+        if len(spans) >= MMAP_MIN_SPANS:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start, end in spans:
+                    if stats is not None:
+                        with stats.timer("read"):
+                            raw = mapped[start:end]
+                        with stats.timer("parse"):
+                            values.append(loads(raw))
+                    else:
+                        values.append(loads(mapped[start:end]))
+            return values
+        for start, end in spans:
+            if stats is not None:
+                with stats.timer("read"):
+                    f.seek(start)
+                    raw = f.read(end - start)
+                with stats.timer("parse"):
+                    values.append(loads(raw))
+            else:
+                f.seek(start)
+                values.append(loads(f.read(end - start)))
+    return values
+
+
+def iter_items(file_path, stats=None):
+    """Yield the items of a JSON export file one at a time.
+
+    A top-level array yields each element; any other document is yielded
+    as a single item. stats (a SearchStats) gets the read and parse times.
+    """
+    if export_fs.getsize(file_path) < STREAM_MIN_BYTES:
+        if stats is None:
+            data = load_file(file_path)
+        else:
+            with stats.timer("read"):
+                raw = read_bytes(file_path)
+            with stats.timer("parse"):
+                data = loads(raw)
+        if isinstance(data, list):
+            yield from data
+        else:
+            yield data
+        return
+
+    for _start, _end, item in iter_spans(file_path, stats=stats):
+        yield item
+
+
+def iter_spans(file_path, chunk_size=CHUNK_SIZE, stats=None):
+    """Yield (start, end, item) for each top-level item of a JSON file.
+
+    start and end are byte offsets into the file, so an item can later be
+    re-read on its own with a seek. Only a chunk or two of the file is held
+    in memory at any time. stats (a SearchStats) gets the read and parse
+    times. A leading byte order mark is skipped; malformed arrays and data
+    after the document raise ValueError, as load_file would.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    with export_fs.open_binary(file_path) as json_file:
+        buf = ""
+        pos = 0
+        byte_pos = 0  # byte offset of buf[pos] in the file
+        eof = False
+
+        def fill():
+            """Append the next chunk to the buffer; False once the file is exhausted."""
+            nonlocal buf, pos, eof
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+            if stats is not None:
+                started = time.perf_counter()
+            chunk = json_file.read(chunk_size)
+            if stats is not None:
+                stats.add("read", time.perf_counter() - started)
+            if not chunk:
+                buf += utf8.decode(b"", final=True)
+                eof = True
+                return False
+            buf += utf8.decode(chunk)
+            return True
+
+        def skip_whitespace():
+            """Move past whitespace; False if only whitespace is left."""
+            nonlocal pos, byte_pos
+            while True:
+                end = _WHITESPACE_RE.match(buf, pos).end()
+                byte_pos += end - pos
+                pos = end
+                if pos < len(buf):
+                    return True
+                if not fill():
+                    return False
+
+        def check_end():
+            if skip_whitespace():
+                raise ValueError(f"Extra data after the JSON document at byte {byte_pos}")
+
+        while not buf and fill():
+            pass
+        if buf.startswith("\ufeff"):
+            pos = 1
+            byte_pos = len(codecs.BOM_UTF8)
+        if not skip_whitespace():
+            return
+
+        if buf[pos] != "[":
+            while fill():
+                pass
+            item, end = decoder.raw_decode(buf, pos)
+            start = byte_pos
+            byte_pos += _utf8_len(buf[pos:end])
+            pos = end
+            yield start, byte_pos, item
+            check_end()
+            return
+
+        pos += 1
+        byte_pos += 1
+        expect_item = None  # None right after "[", then alternating item / separator
+        while True:
+            if not skip_whitespace():
+                raise ValueError("Unterminated JSON array")
+            char = buf[pos]
+            if not expect_item:
+                if char == "]":
+                    pos += 1
+                    byte_pos += 1
+                    check_end()
+                    return
+                if expect_item is False:
+                    if char != ",":
+                        raise ValueError(f"Expected ',' or ']' at byte {byte_pos}")
+                    pos += 1
+                    byte_pos += 1
+                    expect_item = True
+                    continue
+
+            if stats is not None:
+                started = time.perf_counter()
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # A value running to the end of the buffer may be cut off, and a
+                # number may decode short of it ("12" of "1234")
+                complete = eof or _VALUE_TAIL_RE.fullmatch(buf, end) is None
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            finally:
+                if stats is not None:
+                    stats.add("parse", time.perf_counter() - started)
+            if not complete:
+                fill()
+                continue
+
+            start = byte_pos
+            byte_pos += _utf8_len(buf[pos:end])
+            pos = end
+            expect_item = False
+            yield start, byte_pos, item
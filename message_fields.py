@@ -0,0 +1,216 @@
+"""Searchable text of a Slack message, tagged with where it came from.
+
+A FieldPlan is built once per search (or index build) for the sources it
+should cover. Extraction is a fixed set of lookups for the shapes Slack
+writes (message text, rich_text blocks, attachments, files and the two kinds
+of edit record) rather than a generic walk over nested dicts, so covering
+more of the message costs little.
+"""
+
+# Sources, stored as small integers in results and the search index
+SOURCE_TEXT = 0
+SOURCE_DELETED = 1        # original text of a deleted message
+SOURCE_BLOCKS = 2         # rich_text / section blocks, when they differ from the text
+SOURCE_ATTACHMENT = 3     # attachment title, pretext, text, fields and fallback
+SOURCE_FILE = 4           # uploaded file names, titles and previews
+SOURCE_EDITED = 5         # current text of an edited message
+SOURCE_EDIT_ORIGINAL = 6  # text of an edited message before the edit
+
+ALL_SOURCES = (SOURCE_TEXT, SOURCE_DELETED, SOURCE_BLOCKS, SOURCE_ATTACHMENT, SOURCE_FILE,
+               SOURCE_EDITED, SOURCE_EDIT_ORIGINAL)
+SOURCE_NAMES = {
+    SOURCE_TEXT: "text",
+    SOURCE_DELETED: "deleted",
+    SOURCE_BLOCKS: "blocks",
+    SOURCE_ATTACHMENT: "attachment",
+    SOURCE_FILE: "file",
+    SOURCE_EDITED: "edited",
+    SOURCE_EDIT_ORIGINAL: "edit_original",
+}
+# Appended to the author's name in results, as the search always has for deletions
+SOURCE_NAME_SUFFIXES = {
+    SOURCE_DELETED: " (Deleted Message)",
+    SOURCE_EDITED: " (Edited Message)",
+    SOURCE_EDIT_ORIGINAL: " (Edited Message, before edit)",
+}
+
+ATTACHMENT_KEYS = ("pretext", "title", "text", "fallback")
+FILE_KEYS = ("name", "title", "preview")
+_RICH_TEXT_CONTAINERS = ("rich_text_section", "rich_text_quote", "rich_text_preformatted")
+
+
+def _rich_text_elements(elements, parts):
+    for element in elements:
+        if not isinstance(element, dict):
+            continue
+        kind = element.get("type")
+        if kind == "text":
+            parts.append(element.get("text") or "")
+        elif kind == "link":
+            parts.append(element.get("text") or element.get("url") or "")
+        elif kind == "emoji":
+            parts.append(f":{element.get('name', '')}:")
+
+
+def blocks_text(message):
+    """Return the text of a message's rich_text, section and header blocks."""
+    blocks = message.get("blocks")
+    if not isinstance(blocks, list):
+        return ""
+    parts = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        kind = block.get("type")
+        if kind == "rich_text":
+            # Exports may carry "elements": null
+            for element in block.get("elements") or ():
+                if not isinstance(element, dict):
+                    continue
+                if element.get("type") in _RICH_TEXT_CONTAINERS:
+                    _rich_text_elements(element.get("elements") or (), parts)
+                elif element.get("type") == "rich_text_list":
+                    for item in element.get("elements") or ():
+                        if isinstance(item, dict):
+                            _rich_text_elements(item.get("elements") or (), parts)
+                            parts.append("\n")
+        elif kind in ("section", "header"):
+            text = block.get("text")
+            if isinstance(text, dict) and isinstance(text.get("text"), str):
+                parts.append(text["text"] + "\n")
+            for field in (block.get("fields") or ()) if kind == "section" else ():
+                if isinstance(field, dict) and isinstance(field.get("text"), str):
+                    parts.append(field["text"] + "\n")
+    return "".join(parts).strip()
+
+
+def author(message, source):
+    """Return the dict holding the author and ts of a source's text."""
+    if source == SOURCE_DELETED and isinstance(message.get("original"), dict):
+        return message["original"]
+    if source == SOURCE_EDITED and isinstance(message.get("message"), dict):
+        return message["message"]
+    if source == SOURCE_EDIT_ORIGINAL:
+        for key in ("original", "previous_message"):
+            if isinstance(message.get(key), dict):
+                return message[key]
+    return message
+
+
+def timestamps(message):
+    """Return the ts values a search hit on message can carry (see author), its own ts first."""
+    found = [message.get("ts"), message.get("deleted_ts")]
+    for key in ("original", "message", "previous_message"):
+        if isinstance(message.get(key), dict):
+            found.append(message[key].get("ts"))
+    return [ts for ts in found if ts]
+
+
+def _is_text(value):
+    return isinstance(value, str) and value
+
+
+class FieldPlan:
+    """Extract the searchable (source, text) pairs of messages.
+
+    sources limits extraction to a subset of ALL_SOURCES. The pairs come out
+    in a fixed order, so (source, position among that source's texts)
+    identifies a text of a message for rebuilding it later.
+    """
+
+    def __init__(self, sources=ALL_SOURCES):
+        self.sources = frozenset(sources)
+        extractors = []
+        for source, extractor in ((SOURCE_TEXT, self._text), (SOURCE_DELETED, self._deleted),
+                                  (SOURCE_BLOCKS, self._blocks), (SOURCE_ATTACHMENT, self._attachments),
+                                  (SOURCE_FILE, self._files), (SOURCE_EDITED, self._edited),
+                                  (SOURCE_EDIT_ORIGINAL, self._edit_original)):
+            if source in self.sources:
+                extractors.append(extractor)
+        self._extractors = tuple(extractors)
+
+    def extract(self, message):
+        """Return [(source, text)] for every non-empty searchable text of message."""
+        fields = []
+        for extractor in self._extractors:
+            extractor(message, fields)
+        return fields
+
+    def text_of(self, message, source, part):
+        """Return the part-th text of source in message, or None."""
+        texts = [text for field_source, text in self.extract(message) if field_source == source]
+        return texts[part] if part < len(texts) else None
+
+    @staticmethod
+    def _text(message, fields):
+        if _is_text(message.get("text")):
+            fields.append((SOURCE_TEXT, message["text"]))
+
+    @staticmethod
+    def _deleted(message, fields):
+        if message.get("subtype") == "message_deleted" and isinstance(message.get("original"), dict):
+            if _is_text(message["original"].get("text")):
+                fields.append((SOURCE_DELETED, message["original"]["text"]))
+
+    @staticmethod
+    def _blocks(message, fields):
+        if "blocks" not in message:
+            return
+        text = blocks_text(message)
+        # Usually the blocks just repeat the message text
+        if text and text != (message.get("text") or "").strip():
+            fields.append((SOURCE_BLOCKS, text))
+
+    @staticmethod
+    def _attachments(message, fields):
+        attachments = message.get("attachments")
+        if not isinstance(attachments, list):
+            return
+        for attachment in attachments:
+            if not isinstance(attachment, dict):
+                continue
+            seen = set()
+            for key in ATTACHMENT_KEYS:
+                value = attachment.get(key)
+                if _is_text(value) and value not in seen:
+                    seen.add(value)
+                    fields.append((SOURCE_ATTACHMENT, value))
+            for field in attachment.get("fields") or ():
+                if isinstance(field, dict):
+                    for key in ("title", "value"):
+                        if _is_text(field.get(key)):
+                            fields.append((SOURCE_ATTACHMENT, field[key]))
+
+    @staticmethod
+    def _files(message, fields):
+        files = message.get("files")
+        if not isinstance(files, list):
+            return
+        for file in files:
+            if not isinstance(file, dict):
+                continue
+            seen = set()
+            for key in FILE_KEYS:
+                value = file.get(key)
+                if _is_text(value) and value not in seen:
+                    seen.add(value)
+                    fields.append((SOURCE_FILE, value))
+
+    @staticmethod
+    def _edited(message, fields):
+        if message.get("subtype") == "message_changed" and isinstance(message.get("message"), dict):
+            if _is_text(message["message"].get("text")):
+                fields.append((SOURCE_EDITED, message["message"]["text"]))
+
+    @staticmethod
+    def _edit_original(message, fields):
+        if message.get("subtype") != "message_changed":
+            return
+        for key in ("original", "previous_message"):
+            previous = message.get(key)
+            if isinstance(previous, dict) and _is_text(previous.get("text")):
+                fields.append((SOURCE_EDIT_ORIGINAL, previous["text"]))
+                return
+
+
+DEFAULT_PLAN = FieldPlan()
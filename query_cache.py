@@ -0,0 +1,79 @@
+"""Results of recent searches, kept in memory for repeated and refined queries.
+
+Auditors run a search, tweak it and go back to an earlier one. Each finished
+search is stored under the export's fingerprint (its chat files' paths,
+sizes and modification times, see search_index.export_fingerprint) and the
+normalized query (search_query.Query.normalized), so running it again
+returns at once. A query that only narrows a cached one, e.g. by adding a
+word to a line, is answered by filtering the cached results (see
+search_engine.refine_hits) instead of rescanning the export.
+
+Entries are evicted least recently used first once their estimated size
+passes the budget; any change to the export changes its fingerprint, so
+stale results are never returned.
+"""
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Rough memory of one SearchHit apart from its sentence text
+HIT_OVERHEAD = 300
+
+
+def hit_size(hit):
+    """Estimated bytes held by a cached search hit."""
+    return HIT_OVERHEAD + len(hit.sentence)
+
+
+class QueryCache:
+    """LRU cache of complete search results, bounded by their estimated size."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # (fingerprint, normalized query) -> (query, hits, size)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def get(self, fingerprint, query):
+        """Return the cached hits of exactly this search, or None."""
+        key = (fingerprint, query.normalized())
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def superset(self, fingerprint, query):
+        """Return the fewest cached hits of a search that query narrows, or None."""
+        best_key = None
+        for key, (cached_query, hits, _size) in self._entries.items():
+            if key[0] != fingerprint or not query.refines(cached_query):
+                continue
+            if best_key is None or len(hits) < len(self._entries[best_key][1]):
+                best_key = key
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][1]
+
+    def put(self, fingerprint, query, hits, size=None):
+        """Cache the complete results of a search; results bigger than the whole budget are not kept."""
+        if size is None:
+            size = sum(hit_size(hit) for hit in hits)
+        if size > self.max_bytes:
+            return
+        key = (fingerprint, query.normalized())
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old[2]
+        self._entries[key] = (query, hits, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _key, (_query, _hits, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
@@ -0,0 +1,78 @@
+"""Write search results to CSV or JSON Lines as they are found.
+
+Each hit is written and forgotten, so exporting a sweep with millions of hits
+never holds more than one row in memory.
+"""
+import csv
+import json
+import os
+from datetime import datetime, timezone
+
+from message_fields import SOURCE_NAMES
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ("real_name", "user_id", "channel", "timestamp", "source", "match", "file_path")
+
+
+def format_ts(ts):
+    """Turn a Slack ts ("1600000000.000100") into an ISO 8601 UTC timestamp."""
+    try:
+        return datetime.fromtimestamp(float(ts), tz=timezone.utc).isoformat(timespec="seconds")
+    except (TypeError, ValueError, OverflowError, OSError):
+        return ""
+
+
+def to_record(hit, workspace=None):
+    """Return the exported fields of a search_engine.SearchHit as a dict."""
+    return {
+        "real_name": hit.real_name,
+        "user_id": hit.user_id,
+        "channel": workspace.channel_name(hit.file_path) if workspace is not None else None,
+        "timestamp": format_ts(hit.ts),
+        "ts": hit.ts,
+        "source": SOURCE_NAMES.get(hit.source, ""),
+        "match": hit.sentence,
+        "spans": [list(span) for span in hit.spans],
+        "file_path": hit.file_path,
+        "message_index": hit.message_index,
+    }
+
+
+def format_for_path(file_path):
+    return "csv" if os.path.splitext(file_path)[1].lower() == ".csv" else "jsonl"
+
+
+class ResultWriter:
+    """Write hits to an open text file in one of FORMATS."""
+
+    def __init__(self, output, format="jsonl", workspace=None):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        self.output = output
+        self.format = format
+        self.workspace = workspace
+        self.count = 0
+        self._csv = None
+        if format == "csv":
+            self._csv = csv.writer(output)
+            self._csv.writerow(CSV_FIELDS)
+
+    def write(self, hit):
+        record = to_record(hit, self.workspace)
+        if self._csv is not None:
+            self._csv.writerow([record[field] or "" for field in CSV_FIELDS])
+        else:
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        self.output.close()
+
+
+def open_writer(file_path, format=None, workspace=None):
+    """Create file_path and return a ResultWriter for it; format defaults from the extension."""
+    format = format or format_for_path(file_path)
+    # utf-8-sig so Excel recognises the encoding of CSV files
+    encoding = "utf-8-sig" if format == "csv" else "utf-8"
+    output = open(file_path, "w", encoding=encoding, newline="" if format == "csv" else None)
+    return ResultWriter(output, format, workspace)
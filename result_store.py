@@ -0,0 +1,176 @@
+"""Backing store for search results shown in the results pane.
+
+A broad sweep can produce millions of hits, so rows don't keep their text.
+Each row is a handful of integers in typed arrays: numbered real names and
+file paths, the message index and text (source and part) the sentence came
+from, its offsets in that text, the message's ts and its hit spans.
+Sentences are rebuilt from the export when a row is shown; each file's size and modification time
+are noted when its first hit arrives, so a file changed since the search
+shows MISSING_SENTENCE rather than the wrong text.
+"""
+import os
+from array import array
+from collections import OrderedDict
+
+import export_fs
+import json_stream
+from message_fields import DEFAULT_PLAN
+
+# Parsed export files kept around for rebuilding sentences of nearby rows;
+# a page of results usually spans a few dozen day files
+FILE_CACHE_SIZE = 64
+MISSING_SENTENCE = "(message no longer available)"
+
+
+def _signature(file_path):
+    try:
+        return export_fs.signature(file_path)
+    except (OSError,) + export_fs.ARCHIVE_ERRORS:
+        return None
+
+
+def _split_ts(ts):
+    """Split a Slack ts ("1600000000.000100") into (seconds, microseconds), or None if it isn't one."""
+    if not isinstance(ts, str):
+        return None
+    seconds, _, fraction = ts.partition(".")
+    if not (seconds.isdigit() and fraction.isdigit() and len(fraction) == 6) or int(seconds) > 0xFFFFFFFF:
+        return None
+    return int(seconds), int(fraction)
+
+
+class _Numbering:
+    """Give each distinct string a small integer id."""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def id(self, value):
+        number = self._ids.get(value)
+        if number is None:
+            number = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return number
+
+
+class ResultStore:
+    """Array-backed list of search hits (search_engine.SearchHit).
+
+    Rows read back as (real_name, sentence, spans, file_path) tuples.
+    """
+
+    def __init__(self):
+        self._file_cache = OrderedDict()
+        self.clear()
+
+    def clear(self):
+        self._names = _Numbering()
+        self._paths = _Numbering()
+        self._name_ids = array("I")
+        self._path_ids = array("I")
+        # path id -> export_fs.signature of the file when its first hit came in
+        self._signatures = []
+        # path id -> rows of that file, for locations()
+        self._path_rows = []
+        self._message_indices = array("I")
+        self._sources = array("B")
+        self._parts = array("I")
+        self._starts = array("I")
+        self._ends = array("I")
+        self._ts_seconds = array("I")
+        self._ts_fractions = array("I")
+        # row -> ts of the few rows whose ts doesn't fit the two arrays
+        self._odd_ts = {}
+        # Hit spans of row i are _span_offsets[_span_starts[i]:_span_starts[i + 1]]
+        self._span_starts = array("I", [0])
+        self._span_offsets = array("I")
+        self._file_cache.clear()
+
+    def append(self, hit):
+        self._name_ids.append(self._names.id(hit.real_name))
+        path_id = self._paths.id(hit.file_path)
+        if path_id == len(self._signatures):
+            self._signatures.append(_signature(hit.file_path))
+            self._path_rows.append(array("I"))
+        self._path_rows[path_id].append(len(self._path_ids))
+        self._path_ids.append(path_id)
+        self._message_indices.append(hit.message_index)
+        self._sources.append(hit.source)
+        self._parts.append(hit.part)
+        self._starts.append(hit.start)
+        self._ends.append(hit.end)
+        ts_parts = _split_ts(hit.ts)
+        if ts_parts is None:
+            self._odd_ts[len(self._ts_seconds)] = hit.ts
+            ts_parts = (0, 0)
+        self._ts_seconds.append(ts_parts[0])
+        self._ts_fractions.append(ts_parts[1])
+        for start, end in hit.spans:
+            self._span_offsets.append(start)
+            self._span_offsets.append(end)
+        self._span_starts.append(len(self._span_offsets))
+
+    def extend(self, hits):
+        for hit in hits:
+            self.append(hit)
+
+    def __len__(self):
+        return len(self._name_ids)
+
+    def __getitem__(self, row):
+        return self.real_name(row), self.sentence(row), self.spans(row), self.file_path(row)
+
+    def real_name(self, row):
+        return self._names.values[self._name_ids[row]]
+
+    def file_path(self, row):
+        return self._paths.values[self._path_ids[row]]
+
+    def ts(self, row):
+        """Return the ts of the row's message (see search_engine.SearchHit), or None."""
+        if row in self._odd_ts:
+            return self._odd_ts[row]
+        return f"{self._ts_seconds[row]}.{self._ts_fractions[row]:06d}"
+
+    def locations(self, folder):
+        """Return the sorted, distinct (file path, ts) of the rows from files directly in folder."""
+        found = {(file_path, self.ts(row))
+                 for path_id, file_path in enumerate(self._paths.values)
+                 if os.path.dirname(file_path) == folder
+                 for row in self._path_rows[path_id]}
+        return sorted(found, key=lambda location: (location[0], location[1] or ""))
+
+    def spans(self, row):
+        offsets = self._span_offsets[self._span_starts[row]:self._span_starts[row + 1]]
+        return tuple(zip(offsets[::2], offsets[1::2]))
+
+    def sentence(self, row):
+        """Rebuild the row's sentence from its message in the export."""
+        messages = self._load_file(self._path_ids[row])
+        message_index = self._message_indices[row]
+        if messages is None or message_index >= len(messages) or not isinstance(messages[message_index], dict):
+            return MISSING_SENTENCE
+        text = DEFAULT_PLAN.text_of(messages[message_index], self._sources[row], self._parts[row])
+        if text is None:
+            return MISSING_SENTENCE
+        return text[self._starts[row]:self._ends[row]]
+
+    def _load_file(self, path_id):
+        """Return the parsed messages of a file, or None if it can't be read or changed since the search."""
+        file_path = self._paths.values[path_id]
+        signature = self._signatures[path_id]
+        if signature is None or _signature(file_path) != signature:
+            self._file_cache.pop(file_path, None)
+            return None
+        if file_path in self._file_cache:
+            self._file_cache.move_to_end(file_path)
+            return self._file_cache[file_path]
+        try:
+            messages = list(json_stream.iter_items(file_path))
+        except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS:
+            messages = None
+        self._file_cache[file_path] = messages
+        if len(self._file_cache) > FILE_CACHE_SIZE:
+            self._file_cache.popitem(last=False)
+        return messages
@@ -0,0 +1,162 @@
+"""Paged results pane for the main window.
+
+Results live in a ResultStore and only one page of them is ever rendered into
+the Text widget, so a search with hundreds of thousands of hits stays
+responsive. Rows are appended to the visible page while a search runs until
+the page is full; further pages are rendered on demand. Search hits are
+highlighted by tagging their spans in the widget, not by rewriting the text.
+"""
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+from result_store import ResultStore
+
+PAGE_SIZE = 500
+HIT_TAG = "hit"
+
+
+def format_match_row(fields, sentence, spans, file_path):
+    """Build a result row from (label, value) fields, the match and its file path.
+
+    Returns (row_text, highlight ranges as character offsets into row_text).
+    """
+    head = "".join(f"{label}: {value}\n" for label, value in fields) + "Match: "
+    offset = len(head)
+    row_text = f"{head}{sentence}\nFile Path: {file_path}\n{'-'*50}\n"
+    return row_text, [(offset + start, offset + end) for start, end in spans]
+
+
+def default_format_row(result):
+    real_name, sentence, spans, file_path = result
+    return format_match_row([("Real Name", real_name)], sentence, spans, file_path)
+
+
+class ResultsPane:
+    """Text widget plus page navigation over a ResultStore.
+
+    format_row(result) must return (row_text, highlight ranges) with the
+    "File Path:" line as the second-to-last line of row_text; see
+    format_match_row.
+    """
+
+    def __init__(self, parent, height=15):
+        self.store = ResultStore()
+        self.format_row = default_format_row
+        self.page = 0
+        # Line numbers of each rendered row's first line and its file path line
+        self._row_starts = []
+        self._path_lines = []
+
+        self.frame = ttk.Frame(parent)
+
+        text_frame = ttk.Frame(self.frame)
+        text_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(text_frame, orient="vertical")
+        self.text = tk.Text(text_frame, wrap=tk.WORD, height=height, yscrollcommand=self.scrollbar.set,
+                            relief="solid", borderwidth=2)
+        self.scrollbar.config(command=self.text.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.config(state=tk.DISABLED)
+        self.text.tag_configure(HIT_TAG, background="#fff176")
+
+        nav_frame = ttk.Frame(self.frame)
+        nav_frame.pack(side=tk.TOP, fill=tk.X)
+        self.prev_button = ttk.Button(nav_frame, text="< Prev", command=lambda: self.show_page(self.page - 1))
+        self.prev_button.pack(side=tk.LEFT)
+        self.next_button = ttk.Button(nav_frame, text="Next >", command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(nav_frame, text="")
+        self.page_label.pack(side=tk.TOP)
+        self._update_nav()
+
+    def page_count(self):
+        return max(1, -(-len(self.store) // PAGE_SIZE))
+
+    def reset(self, format_row=None):
+        """Drop all results, e.g. before a new search."""
+        self.store.clear()
+        if format_row is not None:
+            self.format_row = format_row
+        self.page = 0
+        self._clear_text()
+        self._update_nav()
+
+    def append(self, results):
+        """Add results, rendering those that still fit on the visible page."""
+        page_end = (self.page + 1) * PAGE_SIZE
+        first_new = len(self.store)
+        self.store.extend(results)
+        if first_new < page_end:
+            # New hits still carry their sentence, so render them directly
+            # instead of rebuilding it from the store
+            end = min(len(self.store), page_end)
+            self._render_rows(first_new, end, results[:end - first_new])
+        self._update_nav()
+
+    def show_page(self, page):
+        page = max(0, min(page, self.page_count() - 1))
+        self.page = page
+        self._clear_text()
+        start = page * PAGE_SIZE
+        self._render_rows(start, min(len(self.store), start + PAGE_SIZE))
+        self.text.yview_moveto(0)
+        self._update_nav()
+
+    def row_at(self, x, y):
+        """Return (row, on_file_path_line) for a point in the text, or None."""
+        if not self._row_starts:
+            return None
+        line = int(self.text.index(f"@{x},{y}").split(".")[0])
+        position = bisect.bisect_right(self._row_starts, line) - 1
+        if position < 0:
+            return None
+        row = self.page * PAGE_SIZE + position
+        return row, line == self._path_lines[position]
+
+    def _clear_text(self):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.config(state=tk.DISABLED)
+        self._row_starts = []
+        self._path_lines = []
+
+    def _render_rows(self, start, end, results=None):
+        if start >= end:
+            return
+        if results is None:
+            results = (self.store[row] for row in range(start, end))
+        line = int(self.text.index("end-1c").split(".")[0])
+        # Alternating text/tags arguments, so the whole batch (hits already
+        # tagged) goes in with a single insert and no index arithmetic
+        segments = []
+        plain = []
+        for result in results:
+            row_text, ranges = self.format_row(result)
+            line_count = row_text.count("\n")
+            self._row_starts.append(line)
+            self._path_lines.append(line + line_count - 2)
+            line += line_count
+            position = 0
+            for hit_start, hit_end in ranges:
+                plain.append(row_text[position:hit_start])
+                segments.extend(("".join(plain), (), row_text[hit_start:hit_end], (HIT_TAG,)))
+                plain = []
+                position = hit_end
+            plain.append(row_text[position:])
+        segments.extend(("".join(plain), ()))
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, *segments)
+        self.text.config(state=tk.DISABLED)
+
+    def _update_nav(self):
+        total = len(self.store)
+        if total:
+            first = self.page * PAGE_SIZE + 1
+            last = min(total, first + PAGE_SIZE - 1)
+            self.page_label.config(text=f"Results {first}-{last} of {total} (page {self.page + 1}/{self.page_count()})")
+        else:
+            self.page_label.config(text="")
+        self.prev_button.config(state=tk.NORMAL if self.page > 0 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if self.page < self.page_count() - 1 else tk.DISABLED)
@@ -0,0 +1,701 @@
+"""Headless search engine for Slack export folders.
+
+Files can be scanned in the calling thread or spread across a process pool.
+In both cases results come back in the same, sorted file order. The module
+has no Tk dependency and doubles as a command-line tool:
+
+    python search_engine.py EXPORT_FOLDER QUERY_FILE -o results.jsonl
+"""
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+import export_fs
+import fuzzy_index
+import json_stream
+import message_fields
+import query_cache
+import result_export
+import search_index
+import search_query
+import thread_index
+import workspace_meta
+from search_stats import SearchStats
+
+# Below this many files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 50
+MAX_CHUNK_FILES = 64
+# How often (seconds) a pooled search checks for cancellation
+STOP_POLL_INTERVAL = 0.1
+
+# SearchControl.stop_reason values
+STOP_CANCELLED = "cancelled"
+STOP_RESULT_LIMIT = "result limit reached"
+STOP_TIME_LIMIT = "time limit reached"
+
+# Slack writes one file per channel and day: <channel>/<YYYY-MM-DD>.json
+_DAY_FILE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})\.json$")
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def load_query(file_path, fuzzy=False, fuzzy_distance=None, word_list=False):
+    """Read and parse a query file, written like the search box (one query per line).
+
+    With word_list, the file is a plain word list (see search_query.quote_word_list).
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        text = file.read()
+    if word_list:
+        text = search_query.quote_word_list(text)
+    return search_query.parse(text, fuzzy, fuzzy_distance)
+
+
+def add_form_filters(query, channels=(), users=(), date_from=None, date_to=None):
+    """Restrict query to the channels, users and days picked outside the query text.
+
+    Raises search_query.QueryError for dates that aren't YYYY-MM-DD.
+    """
+    query.add_filter("channel", channels)
+    query.add_filter("user", users)
+    if date_from or date_to:
+        query.add_filter("date", [f"{date_from or ''}..{date_to or ''}"])
+    return query
+
+
+def channel_context(file_path, workspace=None):
+    """Return the (folder name, channel name) a channel: filter is checked against."""
+    folder_name = os.path.basename(os.path.dirname(file_path))
+    return folder_name, workspace.channel_name(file_path) if workspace is not None else folder_name
+
+
+def file_date(file_path):
+    """Return the day (YYYY-MM-DD) a chat file is named after, or None."""
+    match = _DAY_FILE_RE.fullmatch(os.path.basename(file_path))
+    return match.group(1) if match else None
+
+
+def channel_day_files(file_path):
+    """Return the day files of the channel file_path is in, oldest first."""
+    channel_folder = os.path.dirname(file_path)
+    return sorted(path for path in export_fs.list_files(channel_folder, ".json")
+                  if os.path.dirname(path) == channel_folder and file_date(path))
+
+
+def message_date(ts):
+    """Return the UTC day (YYYY-MM-DD) of a Slack ts, or None."""
+    try:
+        return datetime.fromtimestamp(float(ts), tz=timezone.utc).date().isoformat()
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def find_real_name(data, workspace=None):
+    """Find the real name in the JSON data, including for deleted messages."""
+    if isinstance(data, dict):
+        # Check for regular message
+        if "user_profile" in data:
+            return data["user_profile"].get("real_name", "N/A")
+
+        # Check for deleted message (real name is under 'original.user_profile')
+        elif "subtype" in data and data["subtype"] == "message_deleted" and "original" in data:
+            original = data["original"]
+            if "user_profile" in original or workspace is None:
+                return original.get("user_profile", {}).get("real_name", "N/A")
+            return workspace.real_name(original.get("user"), "N/A")
+
+        # Messages without a profile (file uploads, bots) only carry the user id
+        elif workspace is not None and "user" in data:
+            return workspace.real_name(data["user"], "N/A")
+
+    return "N/A"
+
+
+class SearchHit:
+    """One matching sentence and the message it was found in.
+
+    The sentence is text[start:end] of the part-th text the message has from
+    source (a message_fields SOURCE_* value), so it can be rebuilt from the
+    export if it is dropped; spans are the hit offsets within the sentence.
+    user_id and ts are the Slack user id and message timestamp, when the
+    message has them.
+    """
+
+    __slots__ = ("real_name", "sentence", "spans", "file_path", "message_index", "source", "part", "start",
+                 "end", "user_id", "ts")
+
+    def __init__(self, real_name, sentence, spans, file_path, message_index, source, part, start, end,
+                 user_id=None, ts=None):
+        self.real_name = real_name
+        self.sentence = sentence
+        self.spans = spans
+        self.file_path = file_path
+        self.message_index = message_index
+        self.source = source
+        self.part = part
+        self.start = start
+        self.end = end
+        self.user_id = user_id
+        self.ts = ts
+
+    def __iter__(self):
+        # Unpacks like the old (real_name, sentence, spans, file_path) tuples
+        return iter((self.real_name, self.sentence, self.spans, self.file_path))
+
+    def __reduce__(self):
+        return SearchHit, (self.real_name, self.sentence, self.spans, self.file_path,
+                           self.message_index, self.source, self.part, self.start, self.end, self.user_id, self.ts)
+
+
+def hit_context(hit, workspace=None):
+    """Rebuild the filter context (see search_query.Query) of the message a hit came from."""
+    real_name = hit.real_name
+    suffix = message_fields.SOURCE_NAME_SUFFIXES.get(hit.source, "")
+    if suffix and real_name.endswith(suffix):
+        real_name = real_name[:-len(suffix)]
+    return {
+        "user": (hit.user_id, real_name),
+        "channel": channel_context(hit.file_path, workspace),
+        "deleted": hit.source == message_fields.SOURCE_DELETED,
+        "date": file_date(hit.file_path) or message_date(hit.ts),
+    }
+
+
+def refine_hits(hits, query, workspace=None):
+    """Return the hits whose sentences also match query, with query's hit spans.
+
+    hits are the complete results of a search query narrows (see
+    search_query.Query.refines), so no other sentence can match it.
+    """
+    refined = []
+    for hit in hits:
+        context = hit_context(hit, workspace) if query.filtered else None
+        spans = query.match_sentence(hit.sentence, context)
+        if spans is not None:
+            refined.append(SearchHit(hit.real_name, hit.sentence, spans, hit.file_path, hit.message_index,
+                                     hit.source, hit.part, hit.start, hit.end, hit.user_id, hit.ts))
+    return refined
+
+
+def scan_dict(d, file_path, query, results, workspace=None, stats=None, message_index=0,
+              plan=message_fields.DEFAULT_PLAN):
+    """Scan every searchable text of a message (see message_fields.FieldPlan).
+
+    query is a search_query.Query. Its filters are checked against the
+    message before any text is matched. Each match is appended as a
+    SearchHit; highlighting the spans is left to whoever displays the result.
+    A sentence already found in an earlier text of the same message (e.g. an
+    attachment repeating the message) is skipped.
+    """
+    parts = {}
+    seen = None
+    context = None
+    if query.filtered:
+        channel = channel_context(file_path, workspace)
+        day = file_date(file_path)
+    for source, text in plan.extract(d):
+        part = parts.get(source, 0)
+        parts[source] = part + 1
+        holder = message_fields.author(d, source)
+        user_id = holder.get("user", d.get("user"))
+        ts = holder.get("ts") or d.get("deleted_ts") or d.get("ts")
+        real_name = None
+        if query.filtered:
+            real_name = find_real_name(holder, workspace)
+            context = {
+                "user": (user_id, real_name),
+                "channel": channel,
+                "deleted": source == message_fields.SOURCE_DELETED,
+                # The file's day, as date filters use to skip files
+                "date": day or message_date(ts),
+            }
+            if not query.accepts(context):
+                continue
+        matches = query.match_sentence_spans(text, stats, context)
+        if not matches:
+            continue
+
+        if real_name is None:
+            real_name = find_real_name(holder, workspace)
+        name = real_name + message_fields.SOURCE_NAME_SUFFIXES.get(source, "")
+        found = []
+        for start, end, spans in matches:
+            sentence = text[start:end]
+            if seen is not None and sentence in seen:
+                continue
+            found.append(sentence)
+            results.append(SearchHit(name, sentence, spans, file_path, message_index, source, part, start, end,
+                                     user_id, ts))
+        seen = set(found) if seen is None else seen.union(found)
+
+
+def scan_file(file_path, query, candidates=None, workspace=None, should_stop=None, stats=None):
+    """Scan one file and return (results, error message or None).
+
+    When candidates is given (from the search index, as (message index,
+    start, end) byte spans) only those messages are read; otherwise every
+    message in the file is scanned as
+    it is parsed. workspace (a WorkspaceMetadata) resolves names for
+    messages that don't carry a user profile. should_stop is checked before
+    each message and ends the scan early when it returns True. stats (a
+    SearchStats) collects phase timings and this file's totals.
+    """
+    results = []
+    error = None
+    messages = 0
+    if stats is not None:
+        started = time.perf_counter()
+    try:
+        if candidates is not None:
+            items = search_index.read_spans(file_path, [(start, end) for _, start, end in candidates], stats)
+            indices = [message_index for message_index, _, _ in candidates]
+        else:
+            items = json_stream.iter_items(file_path, stats)
+            indices = None
+        for position, item in enumerate(items):
+            if should_stop is not None and should_stop():
+                break
+            messages += 1
+            if isinstance(item, dict):
+                message_index = indices[position] if indices is not None else position
+                scan_dict(item, file_path, query, results, workspace, stats, message_index)
+    except Exception as e:
+        error = f"Error reading file {file_path}: {e}"
+    if stats is not None:
+        if candidates is not None:
+            size = sum(end - start for _, start, end in candidates)
+        else:
+            try:
+                size = export_fs.getsize(file_path)
+            except (OSError,) + export_fs.ARCHIVE_ERRORS:
+                size = 0
+        stats.add_file(file_path, time.perf_counter() - started, size, messages)
+    return results, error
+
+
+def plan_files(folder_path, query, json_files=None):
+    """Return [(file_path, candidates or None)] for every file the search must read.
+
+    Also prepares the query: a fuzzy query is expanded with the export's
+    similar words, and its clauses are ordered (see search_query.Query.plan).
+    Files its channel and date filters rule out, judged by folder and file
+    name alone, are left out. Files with an up-to-date entry in the search
+    index get the (message index, start, end) byte spans of their candidate
+    messages (possibly none); all others are read in full.
+    """
+    if json_files is None:
+        json_files = search_index.list_json_files(folder_path)
+    if query.fuzzy:
+        query.expand(fuzzy_index.load_vocabulary_index(folder_path, json_files))
+    if query.filtered:
+        workspace = workspace_meta.get_workspace(folder_path)
+        json_files = [file_path for file_path in json_files
+                      if query.accepts({"channel": channel_context(file_path, workspace), "date": file_date(file_path)})]
+    index = search_index.load_index(folder_path)
+    query.plan(index)
+    candidates = query.candidates(index) if index else None
+    if candidates is None:
+        return [(file_path, None) for file_path in json_files]
+
+    tasks = []
+    for file_path in json_files:
+        file_id = index.file_id(file_path)
+        if file_id is None:
+            tasks.append((file_path, None))
+        else:
+            msg_indices = candidates.get(file_id, ())
+            spans = index.candidate_spans(file_id, msg_indices)
+            tasks.append((file_path, [(msg_idx, start, end) for msg_idx, (start, end) in zip(msg_indices, spans)]))
+    return tasks
+
+
+class SearchControl:
+    """Cancellation, result cap and time budget for one search.
+
+    cancel() may be called from any thread. The search checks should_stop()
+    between files and messages and records why it ended in stop_reason
+    (None when it ran to completion). from_cache tells whether the results
+    came from a query_cache.QueryCache instead of the export.
+    """
+
+    def __init__(self, max_results=None, time_limit=None):
+        self.max_results = max_results
+        self.time_limit = time_limit
+        self.deadline = None
+        self.stop_reason = None
+        self.from_cache = False
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self.time_limit:
+            # Wall-clock time, so worker processes can check it too
+            self.deadline = time.time() + self.time_limit
+
+    def stop(self, reason):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        self._stopped.set()
+
+    def cancel(self):
+        self.stop(STOP_CANCELLED)
+
+    def should_stop(self):
+        if self._stopped.is_set():
+            return True
+        if self.deadline is not None and time.time() > self.deadline:
+            self.stop(STOP_TIME_LIMIT)
+            return True
+        return False
+
+
+_worker_query = None
+_worker_workspace = None
+_worker_stop_event = None
+_worker_deadline = None
+_worker_collect_stats = False
+
+
+def _init_worker(query, folder_path, stop_event, deadline, collect_stats=False):
+    global _worker_query, _worker_workspace, _worker_stop_event, _worker_deadline, _worker_collect_stats
+    _worker_query = query
+    _worker_workspace = workspace_meta.get_workspace(folder_path)
+    _worker_stop_event = stop_event
+    _worker_deadline = deadline
+    _worker_collect_stats = collect_stats
+
+
+def _worker_should_stop():
+    return _worker_stop_event.is_set() or (_worker_deadline is not None and time.time() > _worker_deadline)
+
+
+def _scan_chunk(tasks):
+    """Process pool entry point: scan a chunk of files with the worker's query."""
+    results = []
+    errors = []
+    scanned = 0
+    stats = SearchStats() if _worker_collect_stats else None
+    for file_path, candidates in tasks:
+        if _worker_should_stop():
+            break
+        file_results, error = scan_file(file_path, _worker_query, candidates, _worker_workspace,
+                                        _worker_should_stop, stats)
+        results.extend(file_results)
+        scanned += 1
+        if error:
+            errors.append(error)
+    return results, errors, scanned, stats
+
+
+def iter_search(folder_path, query, workers=1, progress_callback=None, error_callback=None, control=None,
+                stats=None, cache=None):
+    """Search every JSON file under folder_path, yielding results as they are found.
+
+    query is a search_query.Query or the query text (which may raise
+    search_query.QueryError). Results are SearchHit objects in file order.
+    progress_callback is called as ``callback(done, total)`` and
+    error_callback as ``callback(message)`` for files that can't be read.
+    With workers > 1 and enough files, the scan runs in a process pool.
+    control (a SearchControl) allows cancelling the search and limiting its
+    result count and run time; the results found up to that point are kept.
+    stats (a SearchStats) switches on per-phase timing for this search.
+    cache (a query_cache.QueryCache) answers repeated and narrowed queries
+    from earlier results and keeps the results of searches that complete;
+    it holds every hit in memory meanwhile, so leave it out for exports.
+    """
+    if isinstance(query, str):
+        query = search_query.parse(query)
+    if control is None:
+        control = SearchControl()
+    if cache is None:
+        results = _iter_search(folder_path, query, workers, progress_callback, error_callback, control, stats)
+    else:
+        results = _iter_cached(folder_path, query, workers, progress_callback, error_callback, control, stats,
+                               cache)
+    if stats is None:
+        yield from results
+        return
+
+    started = time.perf_counter()
+    try:
+        for result in results:
+            stats.results += 1
+            yield result
+    finally:
+        stats.wall_time = time.perf_counter() - started
+
+
+def _cached_hits(folder_path, json_files, fingerprint, query, cache):
+    hits = cache.get(fingerprint, query)
+    if hits is not None:
+        return hits
+    superset = cache.superset(fingerprint, query)
+    if superset is None:
+        return None
+    if query.fuzzy:
+        query.expand(fuzzy_index.load_vocabulary_index(folder_path, json_files))
+    hits = refine_hits(superset, query, workspace_meta.get_workspace(folder_path))
+    cache.put(fingerprint, query, hits)
+    return hits
+
+
+def _iter_cached(folder_path, query, workers, progress_callback, error_callback, control, stats, cache):
+    json_files = search_index.list_json_files(folder_path)
+    fingerprint = search_index.export_fingerprint(folder_path, json_files)
+    if stats is not None:
+        with stats.timer("cache"):
+            hits = _cached_hits(folder_path, json_files, fingerprint, query, cache)
+    else:
+        hits = _cached_hits(folder_path, json_files, fingerprint, query, cache)
+    if hits is not None:
+        control.from_cache = True
+        if progress_callback and json_files:
+            progress_callback(len(json_files), len(json_files))
+        for count, hit in enumerate(hits):
+            if control.max_results is not None and count >= control.max_results:
+                control.stop(STOP_RESULT_LIMIT)
+                return
+            yield hit
+        return
+
+    # Only a complete, error-free result set can stand in for a later search
+    errors = []
+
+    def record_error(message):
+        errors.append(message)
+        if error_callback:
+            error_callback(message)
+
+    collected = []
+    size = 0
+    for hit in _iter_search(folder_path, query, workers, progress_callback, record_error, control, stats,
+                            json_files):
+        if collected is not None:
+            collected.append(hit)
+            size += query_cache.hit_size(hit)
+            if size > cache.max_bytes:
+                collected = None
+        yield hit
+    if collected is not None and control.stop_reason is None and not errors:
+        cache.put(fingerprint, query, collected, size)
+
+
+def _iter_search(folder_path, query, workers, progress_callback, error_callback, control, stats=None,
+                 json_files=None):
+    control.start()
+    if stats is not None:
+        with stats.timer("plan"):
+            tasks = plan_files(folder_path, query, json_files)
+    else:
+        tasks = plan_files(folder_path, query, json_files)
+    total = len(tasks)
+    count = 0
+
+    def report(errors):
+        if error_callback:
+            for error in errors:
+                error_callback(error)
+
+    def at_limit():
+        if control.max_results is not None and count >= control.max_results:
+            control.stop(STOP_RESULT_LIMIT)
+            return True
+        return False
+
+    if workers <= 1 or total < PARALLEL_MIN_FILES:
+        workspace = workspace_meta.get_workspace(folder_path)
+        for done, (file_path, candidates) in enumerate(tasks, start=1):
+            if control.should_stop():
+                return
+            file_results, error = scan_file(file_path, query, candidates, workspace, control.should_stop, stats)
+            for result in file_results:
+                if at_limit():
+                    return
+                yield result
+                count += 1
+            if error:
+                report([error])
+            if progress_callback:
+                progress_callback(done, total)
+        return
+
+    # Several chunks per worker keeps the pool busy when file sizes vary
+    chunk_size = max(1, min(MAX_CHUNK_FILES, math.ceil(total / (workers * 4))))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, total, chunk_size)]
+
+    # Always spawn: forking a process that is running Tk threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    if stats is not None:
+        stats.workers = workers
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(query, folder_path, stop_event, control.deadline,
+                                             stats is not None))
+    try:
+        futures = {executor.submit(_scan_chunk, chunk): i for i, chunk in enumerate(chunks)}
+        pending = set(futures)
+        finished = {}
+        next_chunk = 0
+        done = 0
+        while pending:
+            completed, pending = wait(pending, timeout=STOP_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in completed:
+                if future.cancelled():
+                    continue
+                chunk_results, errors, scanned, chunk_stats = future.result()
+                finished[futures[future]] = (chunk_results, errors)
+                done += scanned
+                if chunk_stats is not None:
+                    stats.merge(chunk_stats)
+            if completed and progress_callback:
+                progress_callback(done, total)
+
+            # Hand results on in file order as soon as the leading chunks are in
+            while next_chunk in finished and not stop_event.is_set():
+                chunk_results, errors = finished.pop(next_chunk)
+                for result in chunk_results:
+                    if at_limit():
+                        break
+                    yield result
+                    count += 1
+                report(errors)
+                next_chunk += 1
+
+            if control.should_stop() and not stop_event.is_set():
+                stop_event.set()
+                for future in pending:
+                    future.cancel()
+
+        # After a cancel or timeout, keep what the remaining chunks found
+        if control.stop_reason != STOP_RESULT_LIMIT:
+            for chunk_index in sorted(finished):
+                chunk_results, errors = finished[chunk_index]
+                for result in chunk_results:
+                    if at_limit():
+                        return
+                    yield result
+                    count += 1
+                report(errors)
+    finally:
+        # Stops queued and running chunks if the caller abandons the search early
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def search_folder(folder_path, query, workers=1, progress_callback=None, error_callback=None, control=None,
+                  stats=None, cache=None):
+    """Search every JSON file under folder_path and return the list of results."""
+    return list(iter_search(folder_path, query, workers, progress_callback, error_callback, control, stats,
+                            cache))
+
+
+def main(argv=None):
+    """Command-line entry point: stream matches for a word file as JSON lines."""
+    parser = argparse.ArgumentParser(
+        description="Search a Slack export folder without the CrawlSpace GUI.")
+    parser.add_argument("folder", help="Slack export folder or .zip export")
+    parser.add_argument("query", help="text file with the query, written as in the search box")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file to write matches to (default: stdout)")
+    parser.add_argument("--word-list", action="store_true",
+                        help="read the query file as a plain word list: no operators, filters or quotes")
+    parser.add_argument("-f", "--format", choices=result_export.FORMATS, default=None,
+                        help="output format (default: from the output file extension, else jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=default_workers(),
+                        help="worker processes to scan with (default: CPU count)")
+    parser.add_argument("--build-index", action="store_true",
+                        help="build or refresh the on-disk search, vocabulary and thread indexes before searching")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="also match words within a few typos of the query words")
+    parser.add_argument("--fuzzy-distance", type=int, default=None, metavar="N",
+                        help="edits a fuzzy match may be away (default: 0-2 by word length)")
+    parser.add_argument("--channel", action="append", default=[], metavar="NAME",
+                        help="only search this channel (repeat for several)")
+    parser.add_argument("--user", action="append", default=[], metavar="NAME",
+                        help="only search messages by this user, by name or user ID (repeat for several)")
+    parser.add_argument("--from", dest="date_from", default=None, metavar="YYYY-MM-DD",
+                        help="only search messages from this day on")
+    parser.add_argument("--to", dest="date_to", default=None, metavar="YYYY-MM-DD",
+                        help="only search messages up to and including this day")
+    parser.add_argument("--max-results", type=int, default=None,
+                        help="stop after this many matches")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="stop after this many seconds, keeping the matches found so far")
+    parser.add_argument("--stats", metavar="PATH", default=None,
+                        help="time each search phase and write the diagnostics as JSON to PATH")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't report progress on stderr")
+    args = parser.parse_args(argv)
+    # Matches may go to stdout, so the modules' diagnostics go to stderr
+    logging.basicConfig(stream=sys.stderr, format="%(message)s")
+
+    if not export_fs.isdir(args.folder):
+        parser.error(f"folder or zip export not found: {args.folder}")
+    args.folder = export_fs.export_root(args.folder)
+    try:
+        query = load_query(args.query, args.fuzzy or args.fuzzy_distance is not None, args.fuzzy_distance,
+                           args.word_list)
+        add_form_filters(query, args.channel, args.user, args.date_from, args.date_to)
+    except OSError as e:
+        parser.error(f"failed to load the query: {e}")
+    except search_query.QueryError as e:
+        parser.error(f"invalid query: {e}")
+
+    def progress(done, total):
+        if not args.quiet:
+            print(f"\rFiles Scanned: {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    def report_error(message):
+        print(f"\n{message}", file=sys.stderr)
+
+    start_time = time.time()
+    if args.build_index:
+        search_index.build_index(args.folder)
+        fuzzy_index.build_vocabulary_index(args.folder)
+        thread_index.build_thread_indexes(args.folder)
+
+    workspace = workspace_meta.get_workspace(args.folder)
+    if args.output == "-":
+        writer = result_export.ResultWriter(sys.stdout, args.format or "jsonl", workspace)
+    else:
+        writer = result_export.open_writer(args.output, args.format, workspace)
+    control = SearchControl(max_results=args.max_results, time_limit=args.time_limit)
+    stats = SearchStats() if args.stats else None
+    count = 0
+    search = iter_search(args.folder, query, args.workers, progress, report_error, control, stats)
+    try:
+        for result in search:
+            writer.write(result)
+            count += 1
+    except KeyboardInterrupt:
+        control.cancel()
+    finally:
+        search.close()
+        if args.output != "-":
+            writer.close()
+
+    elapsed_time = time.time() - start_time
+    if not args.quiet:
+        if control.stop_reason:
+            print(f"\nSearch stopped ({control.stop_reason}): {count} results in {elapsed_time:.2f} seconds",
+                  file=sys.stderr)
+        else:
+            print(f"\nTotal Results Found: {count} in {elapsed_time:.2f} seconds", file=sys.stderr)
+        if stats is not None:
+            print(stats.summary(), file=sys.stderr)
+    if stats is not None:
+        stats.save(args.stats)
+    return 130 if control.stop_reason == STOP_CANCELLED else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""Persistent positional index for Slack export folders.
+
+The index lives in a single file under ``<export>/.crawlspace/`` and maps every
+lower-cased word token to the messages (and token positions) it occurs in.
+Postings and message byte spans are delta/varint encoded; the term dictionary
+and file table are stored as zlib-compressed JSON.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import zlib
+
+import export_fs
+import json_stream
+import workspace_meta
+from message_fields import DEFAULT_PLAN
+
+log = logging.getLogger(__name__)
+
+INDEX_DIR = ".crawlspace"
+INDEX_FILE = "index.bin"
+INDEX_MAGIC = b"CSIDX001"
+INDEX_VERSION = 2
+
+# Files at the root of an export that describe the workspace rather than hold messages
+METADATA_FILES = workspace_meta.METADATA_FILES + ("integration_logs.json", "org_users.json", "canvases.json")
+
+TOKEN_RE = re.compile(r"\w+")
+_HEADER = struct.Struct("<8sQQQ")
+
+
+def tokenize(text):
+    """Split text into lower-cased word tokens."""
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+
+def list_json_files(folder_path):
+    """Return the chat .json files under folder_path (a folder or zip export) in a stable, sorted order.
+
+    The workspace files at the root (users.json, channels.json, ...) are left out.
+    """
+    return [file_path for file_path in export_fs.list_files(folder_path, ".json", skip_dirs=(INDEX_DIR,))
+            if os.path.relpath(file_path, folder_path) not in METADATA_FILES]
+
+
+def data_path(folder_path, file_name):
+    """Return where a file CrawlSpace keeps for an export (e.g. its index) is stored."""
+    archive_path, member = export_fs.split_archive(folder_path)
+    if archive_path is None:
+        return os.path.join(folder_path, INDEX_DIR, file_name)
+    # A zip can't be written to, so its files sit next to it
+    name = os.path.basename(archive_path) + (f"-{member.replace('/', '-')}" if member else "")
+    return os.path.join(os.path.dirname(os.path.abspath(archive_path)), INDEX_DIR, f"{name}.{file_name}")
+
+
+def index_path(folder_path):
+    return data_path(folder_path, INDEX_FILE)
+
+
+def export_fingerprint(folder_path, json_files=None):
+    """Return a digest of the export's chat files that changes whenever any of them does."""
+    if json_files is None:
+        json_files = list_json_files(folder_path)
+    digest = hashlib.sha1()
+    for file_path in json_files:
+        try:
+            size, version = _file_signature(file_path)
+        except (OSError,) + export_fs.ARCHIVE_ERRORS:
+            size, version = -1, -1
+        digest.update(f"{os.path.relpath(file_path, folder_path)}\0{size}\0{version}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_varint(buf, value):
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varints(data):
+    """Decode a whole varint stream into a list of integers."""
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    return values
+
+
+def _file_signature(file_path):
+    return export_fs.signature(file_path)
+
+
+def build_index(folder_path, progress_callback=None):
+    """Build (or rebuild) the index for folder_path and write it to disk.
+
+    progress_callback, when given, is called as ``callback(done, total)``
+    after each file. Returns the path of the written index file.
+    """
+    json_files = list_json_files(folder_path)
+    total = len(json_files)
+
+    files = []
+    spans_blob = bytearray()
+    # term -> [encoded postings, last file id, last message index]
+    postings = {}
+
+    for file_id, file_path in enumerate(json_files):
+        span_offset = len(spans_blob)
+        message_count = 0
+        previous_end = 0
+        try:
+            size, mtime_ns = _file_signature(file_path)
+            for msg_idx, (start, end, item) in enumerate(json_stream.iter_spans(file_path)):
+                _write_varint(spans_blob, start - previous_end)
+                _write_varint(spans_blob, end - start)
+                previous_end = end
+                message_count += 1
+                if not isinstance(item, dict):
+                    continue
+                # "field" numbers the message's searchable texts (see message_fields)
+                for field, (_source, text) in enumerate(DEFAULT_PLAN.extract(item)):
+                    positions = {}
+                    for position, token in enumerate(tokenize(text)):
+                        positions.setdefault(token, []).append(position)
+                    for token, token_positions in positions.items():
+                        entry = postings.get(token)
+                        if entry is None:
+                            entry = postings[token] = [bytearray(), 0, 0]
+                        buf = entry[0]
+                        if entry[1] != file_id or not buf:
+                            _write_varint(buf, file_id - entry[1])
+                            _write_varint(buf, msg_idx)
+                        else:
+                            _write_varint(buf, 0)
+                            _write_varint(buf, msg_idx - entry[2])
+                        entry[1] = file_id
+                        entry[2] = msg_idx
+                        _write_varint(buf, field)
+                        _write_varint(buf, len(token_positions))
+                        previous_position = 0
+                        for position in token_positions:
+                            _write_varint(buf, position - previous_position)
+                            previous_position = position
+        except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+            # Unreadable (or vanished) files are recorded as stale so searches fall back to
+            # scanning them directly and surface the error there. Any
+            # postings already written for them are ignored for the same reason.
+            log.warning("Skipping %s while indexing: %s", file_path, e)
+            files.append([os.path.relpath(file_path, folder_path), -1, -1, span_offset, 0, 0])
+            if progress_callback:
+                progress_callback(file_id + 1, total)
+            continue
+
+        files.append([
+            os.path.relpath(file_path, folder_path), size, mtime_ns,
+            span_offset, len(spans_blob) - span_offset, message_count,
+        ])
+        if progress_callback:
+            progress_callback(file_id + 1, total)
+
+    postings_blob = bytearray()
+    terms = {}
+    for token in sorted(postings):
+        buf = postings[token][0]
+        terms[token] = [len(postings_blob), len(buf)]
+        postings_blob += buf
+
+    meta = zlib.compress(json.dumps({
+        "version": INDEX_VERSION,
+        "files": files,
+        "terms": terms,
+    }, separators=(",", ":")).encode("utf-8"))
+
+    target = index_path(folder_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "wb") as index_file:
+        index_file.write(_HEADER.pack(INDEX_MAGIC, len(meta), len(spans_blob), len(postings_blob)))
+        index_file.write(meta)
+        index_file.write(spans_blob)
+        index_file.write(postings_blob)
+    os.replace(tmp_path, target)
+    return target
+
+
+def load_index(folder_path):
+    """Load the index for folder_path, or return None if there isn't a usable one."""
+    path = index_path(folder_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as index_file:
+            magic, meta_len, spans_len, postings_len = _HEADER.unpack(index_file.read(_HEADER.size))
+            if magic != INDEX_MAGIC:
+                return None
+            meta = json.loads(zlib.decompress(index_file.read(meta_len)))
+            spans_blob = index_file.read(spans_len)
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        log.warning("Error loading index: %s", e)
+        return None
+    if meta.get("version") != INDEX_VERSION:
+        return None
+    postings_start = _HEADER.size + meta_len + spans_len
+    return ExportIndex(folder_path, path, meta, spans_blob, postings_start)
+
+
+class ExportIndex:
+    """Read-only view of an on-disk export index."""
+
+    def __init__(self, folder_path, path, meta, spans_blob, postings_start):
+        self.folder_path = folder_path
+        self.path = path
+        self.files = meta["files"]
+        self.terms = meta["terms"]
+        self.file_ids = {entry[0]: file_id for file_id, entry in enumerate(self.files)}
+        self._spans_blob = spans_blob
+        self._postings_start = postings_start
+
+    def file_id(self, file_path):
+        """Return the file id for file_path if its indexed copy is still current."""
+        file_id = self.file_ids.get(os.path.relpath(file_path, self.folder_path))
+        if file_id is None:
+            return None
+        entry = self.files[file_id]
+        try:
+            if _file_signature(file_path) != (entry[1], entry[2]):
+                return None
+        except OSError:
+            return None
+        return file_id
+
+    def covers(self, json_files):
+        """True if json_files are exactly the indexed files, all unchanged since indexing."""
+        if len(json_files) != len(self.files):
+            return False
+        return all(self.file_id(file_path) is not None for file_path in json_files)
+
+    def postings(self, token):
+        """Return {(file_id, msg_idx, field): positions} for a single token."""
+        location = self.terms.get(token)
+        if location is None:
+            return {}
+        offset, length = location
+        with open(self.path, "rb") as index_file:
+            index_file.seek(self._postings_start + offset)
+            values = _read_varints(index_file.read(length))
+
+        result = {}
+        file_id = 0
+        msg_idx = 0
+        i = 0
+        while i < len(values):
+            file_delta, msg_value, field, count = values[i:i + 4]
+            i += 4
+            if file_delta or not result:
+                file_id += file_delta
+                msg_idx = msg_value
+            else:
+                msg_idx += msg_value
+            positions = []
+            position = 0
+            for delta in values[i:i + count]:
+                position += delta
+                positions.append(position)
+            i += count
+            result[(file_id, msg_idx, field)] = positions
+        return result
+
+    def term_size(self, word):
+        """Estimate how many messages contain word from its postings' size in bytes.
+
+        Only a relative measure, for ordering lookups; 0 means no message has it.
+        """
+        tokens = tokenize(word)
+        if not tokens:
+            return None
+        return min(self.terms[token][1] if token in self.terms else 0 for token in tokens)
+
+    def word_hits(self, word, cache):
+        """Return the set of (file_id, msg_idx, field) that can contain word.
+
+        Returns None for a word the index can't answer (one without any word
+        characters). cache maps tokens to their postings and is shared
+        between lookups of one search.
+        """
+        tokens = tokenize(word)
+        if not tokens:
+            return None
+        for token in tokens:
+            if token not in cache:
+                cache[token] = self.postings(token)
+        if len(tokens) == 1:
+            return set(cache[tokens[0]])
+
+        # Multi-token words (e.g. "e-mail") and phrases need their tokens at adjacent positions
+        first = cache[tokens[0]]
+        hits = set()
+        for key, positions in first.items():
+            for position in positions:
+                if all(position + offset in cache[token].get(key, ())
+                       for offset, token in enumerate(tokens[1:], start=1)):
+                    hits.add(key)
+                    break
+        return hits
+
+    def message_spans(self, file_id):
+        entry = self.files[file_id]
+        span_offset, span_len = entry[3], entry[4]
+        values = _read_varints(self._spans_blob[span_offset:span_offset + span_len])
+        spans = []
+        end = 0
+        for i in range(0, len(values), 2):
+            start = end + values[i]
+            end = start + values[i + 1]
+            spans.append((start, end))
+        return spans
+
+    def candidate_spans(self, file_id, msg_indices):
+        """Return the byte spans of the given messages of an indexed file."""
+        spans = self.message_spans(file_id)
+        return [spans[msg_idx] for msg_idx in msg_indices]
+
+
+def read_spans(file_path, spans, stats=None):
+    """Read and parse the JSON values at the given byte spans of a file."""
+    return json_stream.load_spans(file_path, spans, stats)
@@ -0,0 +1,779 @@
+"""Query language of the search box.
+
+Each non-empty line is a query, and a sentence matches when any line does.
+Within a line:
+
+    password                  the word, whole and ignoring case
+    "bob merger"              an exact phrase (any whitespace between the words)
+    "OR"  "user:bob"          quotes also make operators and filters plain text
+    budget review             both words (same as: budget AND review)
+    wire OR transfer          either word
+    password NOT test         NOT excludes sentences
+    (wire OR transfer) bank   parentheses group clauses
+    merger NEAR/5 bob         both within 5 words of each other (NEAR alone: 5)
+    (fuzzy search)            unquoted words also match similar words of the export
+    user:alice  user:U0123    messages whose author's name contains alice, or by that user id
+    channel:general           messages in a channel
+    deleted:yes  deleted:no   only (or no) deleted messages
+    date:2023-01-01..2023-03-31   messages of those days (either end may be left out)
+    after: before: on: during:    Slack's date filters (after:/before: leave the day out;
+                                  during: takes a day, month or year)
+
+Words and phrases are checked sentence by sentence, as the search always has,
+so a plain word list keeps its old meaning. Filters are about the message and
+are checked before its text is matched at all; channel and date filters
+before a file is even read (by its folder and YYYY-MM-DD file name).
+
+parse() turns the text into a Query. Query.expand() adds the similar words of
+a fuzzy search. Query.plan() orders each clause's parts
+so the cheapest and most selective are evaluated first, using the search
+index's posting sizes when there is one, and Query.candidates() answers the
+query from the index as far as it can.
+"""
+import calendar
+import re
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from term_matcher import TermMatcher, merge_spans, split_sentences, term_key
+
+FILTER_FIELDS = ("user", "channel", "deleted", "date")
+# Slack's own date filters, turned into date: ranges
+DATE_ALIASES = ("after", "before", "on", "during")
+DEFAULT_NEAR = 5
+# Largest OR of ANDs Query.refines() expands a query into
+MAX_CONJUNCTIONS = 64
+_TRUE_VALUES = ("yes", "true", "1")
+_FALSE_VALUES = ("no", "false", "0")
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<field>[A-Za-z]+):(?:"(?P<field_quoted>[^"]*)"|(?P<field_value>[^\s()"]+))
+      | "(?P<quoted>[^"]*)"
+      | (?P<word>[^\s()"]+)
+      | (?P<bad>")
+    )''', re.VERBOSE)
+_NEAR_RE = re.compile(r"NEAR(?:/(\d+))?$")
+_WORD_RE = re.compile(r"\w+")
+
+# Evaluation order of clause kinds within AND/OR: filters, text, proximity, negations
+_RANK_FILTER = 0
+_RANK_TEXT = 1
+_RANK_NEAR = 2
+_RANK_NOT = 3
+_UNKNOWN = float("inf")
+
+
+class QueryError(ValueError):
+    """A search query that can't be parsed."""
+
+
+class _Sentence:
+    """What clauses are evaluated against: one sentence's hits and its message."""
+
+    __slots__ = ("text", "start", "end", "found", "context", "_word_starts")
+
+    def __init__(self, text, start, end, found, context):
+        self.text = text
+        self.start = start
+        self.end = end
+        # term id -> [(start, end)] hits in text
+        self.found = found
+        self.context = context
+        self._word_starts = None
+
+    def word_index(self, offset):
+        if self._word_starts is None:
+            self._word_starts = [match.start() for match in _WORD_RE.finditer(self.text, self.start, self.end)]
+        return bisect_right(self._word_starts, offset) - 1
+
+
+class Term:
+    """A word or phrase, plus the similar words a fuzzy search also looks for.
+
+    literal terms (quoted in the query) are never expanded.
+    """
+
+    rank = _RANK_TEXT
+
+    def __init__(self, text, literal=False):
+        self.key = term_key(text)
+        self.literal = literal
+        self.keys = [self.key]
+        self.ids = ()
+
+    def terms(self, positive=True):
+        yield self, positive
+
+    def normalized(self):
+        return f'"{self.key}"' if self.literal else self.key
+
+    def hits(self, found):
+        """Return the (start, end) hits of any of the term's words."""
+        if len(self.ids) == 1:
+            return found.get(self.ids[0])
+        return [hit for term_id in self.ids for hit in found.get(term_id, ())]
+
+    def evaluate(self, sentence):
+        return any(term_id in sentence.found for term_id in self.ids)
+
+    def check(self, context):
+        return None
+
+    def candidates(self, index, cache):
+        union = set()
+        for key in self.keys:
+            hits = index.word_hits(key, cache)
+            if hits is None:
+                return None
+            union |= hits
+        return union
+
+    def plan(self, estimate):
+        return sum(estimate(key) for key in self.keys)
+
+
+class Near:
+    """Two terms at most distance words apart."""
+
+    rank = _RANK_NEAR
+
+    def __init__(self, left, right, distance):
+        self.left = left
+        self.right = right
+        self.distance = distance
+
+    def terms(self, positive=True):
+        yield self.left, positive
+        yield self.right, positive
+
+    def normalized(self):
+        return f"({self.left.normalized()} NEAR/{self.distance} {self.right.normalized()})"
+
+    def evaluate(self, sentence):
+        left_hits = self.left.hits(sentence.found)
+        right_hits = self.right.hits(sentence.found)
+        if not left_hits or not right_hits:
+            return False
+        for left_start, left_end in left_hits:
+            left_first, left_last = sentence.word_index(left_start), sentence.word_index(left_end - 1)
+            for right_start, right_end in right_hits:
+                right_first, right_last = sentence.word_index(right_start), sentence.word_index(right_end - 1)
+                # Words strictly between the two hits (negative when they overlap)
+                if max(right_first - left_last, left_first - right_last) - 1 <= self.distance:
+                    return True
+        return False
+
+    def check(self, context):
+        return None
+
+    def candidates(self, index, cache):
+        return _intersect((self.left, self.right), index, cache)
+
+    def plan(self, estimate):
+        return min(self.left.plan(estimate), self.right.plan(estimate))
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f'"{value}" is not a date; write dates as YYYY-MM-DD') from None
+
+
+def _date_range(field, value):
+    """Return the inclusive (first, last) ISO days of a date filter; either may be None."""
+    if field == "date":
+        first, separator, last = value.partition("..")
+        if not separator:
+            last = first
+        return (_parse_date(first).isoformat() if first else None,
+                _parse_date(last).isoformat() if last else None)
+    if field == "after":
+        return (_parse_date(value) + timedelta(days=1)).isoformat(), None
+    if field == "before":
+        return None, (_parse_date(value) - timedelta(days=1)).isoformat()
+    if field == "on":
+        return _parse_date(value).isoformat(), _parse_date(value).isoformat()
+    # during: a year, a month or a day
+    parts = value.split("-")
+    try:
+        if len(parts) == 1:
+            year = int(parts[0])
+            return date(year, 1, 1).isoformat(), date(year, 12, 31).isoformat()
+        if len(parts) == 2:
+            year, month = int(parts[0]), int(parts[1])
+            return (date(year, month, 1).isoformat(),
+                    date(year, month, calendar.monthrange(year, month)[1]).isoformat())
+    except ValueError:
+        raise QueryError(f'during: takes YYYY, YYYY-MM or YYYY-MM-DD, not "{value}"') from None
+    return _parse_date(value).isoformat(), _parse_date(value).isoformat()
+
+
+class Filter:
+    """user:, channel:, deleted: or date condition on the message."""
+
+    rank = _RANK_FILTER
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value.lower()
+        if field in ("date",) + DATE_ALIASES:
+            self.field = "date"
+            self.value = _date_range(field, value)
+        elif field == "channel":
+            self.value = self.value.lstrip("#")
+        elif field == "deleted":
+            if self.value in _TRUE_VALUES:
+                self.value = True
+            elif self.value in _FALSE_VALUES:
+                self.value = False
+            else:
+                raise QueryError(f'deleted: takes yes or no, not "{value}"')
+
+    def terms(self, positive=True):
+        return ()
+
+    def normalized(self):
+        if self.field == "date":
+            first, last = self.value
+            return f"date:{first or ''}..{last or ''}"
+        return f"{self.field}:{self.value}"
+
+    def check(self, context):
+        """True/False once the message's field is known, else None."""
+        if context is None or self.field not in context:
+            return None
+        value = context[self.field]
+        if self.field == "date":
+            # Messages of unknown date (e.g. no ts) can't be placed
+            if value is None:
+                return None
+            first, last = self.value
+            return (first is None or first <= value) and (last is None or value <= last)
+        if self.field == "user":
+            user_id, real_name = value
+            return (user_id or "").lower() == self.value or self.value in (real_name or "").lower()
+        if self.field == "channel":
+            return any(self.value == (name or "").lower().lstrip("#") for name in value)
+        return value == self.value
+
+    def evaluate(self, sentence):
+        return bool(self.check(sentence.context))
+
+    def candidates(self, index, cache):
+        return None
+
+    def plan(self, estimate):
+        return _UNKNOWN
+
+
+class Not:
+    rank = _RANK_NOT
+
+    def __init__(self, child):
+        self.child = child
+
+    def terms(self, positive=True):
+        return self.child.terms(not positive)
+
+    def normalized(self):
+        return f"NOT {self.child.normalized()}"
+
+    def evaluate(self, sentence):
+        return not self.child.evaluate(sentence)
+
+    def check(self, context):
+        result = self.child.check(context)
+        return None if result is None else not result
+
+    def candidates(self, index, cache):
+        return None
+
+    def plan(self, estimate):
+        self.child.plan(estimate)
+        return _UNKNOWN
+
+
+class And:
+    rank = _RANK_TEXT
+
+    def __init__(self, children):
+        self.children = children
+
+    def terms(self, positive=True):
+        for child in self.children:
+            yield from child.terms(positive)
+
+    def normalized(self):
+        return _normalized_group(self, "AND")
+
+    def evaluate(self, sentence):
+        return all(child.evaluate(sentence) for child in self.children)
+
+    def check(self, context):
+        results = [child.check(context) for child in self.children]
+        if False in results:
+            return False
+        return True if all(results) else None
+
+    def candidates(self, index, cache):
+        return _intersect(self.children, index, cache)
+
+    def plan(self, estimate):
+        # Most selective first, so evaluation and index lookups stop early
+        frequencies = {id(child): child.plan(estimate) for child in self.children}
+        self.children.sort(key=lambda child: (child.rank, frequencies[id(child)]))
+        return min(frequencies.values())
+
+
+class Or:
+    rank = _RANK_TEXT
+
+    def __init__(self, children):
+        self.children = children
+
+    def terms(self, positive=True):
+        for child in self.children:
+            yield from child.terms(positive)
+
+    def normalized(self):
+        return _normalized_group(self, "OR")
+
+    def evaluate(self, sentence):
+        return any(child.evaluate(sentence) for child in self.children)
+
+    def check(self, context):
+        results = [child.check(context) for child in self.children]
+        if True in results:
+            return True
+        return False if all(result is False for result in results) else None
+
+    def candidates(self, index, cache):
+        union = set()
+        for child in self.children:
+            hits = child.candidates(index, cache)
+            if hits is None:
+                return None
+            union |= hits
+        return union
+
+    def plan(self, estimate):
+        # Most likely to match first
+        frequencies = {id(child): child.plan(estimate) for child in self.children}
+        self.children.sort(key=lambda child: (child.rank, -frequencies[id(child)]))
+        return sum(frequencies.values())
+
+
+def _walk(node):
+    yield node
+    for child in getattr(node, "children", ()):
+        yield from _walk(child)
+    if isinstance(node, Not):
+        yield from _walk(node.child)
+
+
+def _normalized_group(node, operator):
+    """Normalized form of an AND/OR: nested groups of the same kind flattened, duplicates dropped, sorted."""
+    parts = set()
+    pending = list(node.children)
+    while pending:
+        child = pending.pop()
+        if type(child) is type(node):
+            pending.extend(child.children)
+        else:
+            parts.add(child.normalized())
+    if len(parts) == 1:
+        return parts.pop()
+    return "(" + f" {operator} ".join(sorted(parts)) + ")"
+
+
+def _conjunctions(node):
+    """Return node as an OR of ANDs: a list of frozensets of normalized clauses, or None if too many."""
+    if isinstance(node, Or):
+        result = []
+        for child in node.children:
+            child_result = _conjunctions(child)
+            if child_result is None:
+                return None
+            result.extend(child_result)
+    elif isinstance(node, And):
+        result = [frozenset()]
+        for child in node.children:
+            child_result = _conjunctions(child)
+            if child_result is None:
+                return None
+            result = [clauses | child_clauses for clauses in result for child_clauses in child_result]
+            if len(result) > MAX_CONJUNCTIONS:
+                return None
+    elif isinstance(node, Near):
+        # A NEAR also needs each of its terms
+        result = [frozenset([node.normalized(), node.left.normalized(), node.right.normalized()])]
+    else:
+        result = [frozenset([node.normalized()])]
+    return result
+
+
+def _intersect(children, index, cache):
+    """Index hits of all children, or None if none of them narrows the search."""
+    result = None
+    for child in children:
+        hits = child.candidates(index, cache)
+        if hits is None:
+            continue
+        result = hits if result is None else result & hits
+        if not result:
+            # Nothing left to narrow: skip reading the other postings
+            return result
+    return result
+
+
+def _tokenize(line):
+    tokens = []
+    position = 0
+    line = line.rstrip()
+    while position < len(line):
+        match = _TOKEN_RE.match(line, position)
+        position = match.end()
+        if match.group("paren"):
+            tokens.append((match.group("paren"), None))
+        elif match.group("field"):
+            field = match.group("field").lower()
+            value = match.group("field_value")
+            if value is None:
+                value = match.group("field_quoted")
+            if field in FILTER_FIELDS or field in DATE_ALIASES:
+                if not value.strip():
+                    raise QueryError(f"{field}: needs a value")
+                tokens.append(("filter", (field, value.strip())))
+            else:
+                # Not a filter, just text with a colon (e.g. a URL)
+                tokens.append(("term", f"{match.group('field')}:{value}"))
+        elif match.group("quoted") is not None:
+            if not match.group("quoted").strip():
+                raise QueryError("Empty quotes")
+            tokens.append(("literal", match.group("quoted")))
+        elif match.group("bad"):
+            raise QueryError("Missing closing quote")
+        else:
+            word = match.group("word")
+            near = _NEAR_RE.match(word)
+            if word in ("AND", "OR", "NOT"):
+                tokens.append((word, None))
+            elif near:
+                tokens.append(("NEAR", int(near.group(1)) if near.group(1) else DEFAULT_NEAR))
+            else:
+                tokens.append(("term", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, line):
+        self.tokens = _tokenize(line)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError(f'Unexpected "{self.peek()}"')
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == "OR":
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() not in (None, ")", "OR"):
+            if self.peek() == "AND":
+                self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self):
+        if self.peek() == "NOT":
+            self.next()
+            return Not(self.parse_not())
+        return self.parse_near()
+
+    def parse_near(self):
+        node = self.parse_primary()
+        while self.peek() == "NEAR":
+            distance = self.next()[1]
+            right = self.parse_primary()
+            if not isinstance(node, Term) or not isinstance(right, Term):
+                raise QueryError("NEAR needs a word or phrase on each side")
+            node = Near(node, right, distance)
+        return node
+
+    def parse_primary(self):
+        kind = self.peek()
+        if kind is None:
+            raise QueryError("Query ends where a word was expected")
+        kind, value = self.next()
+        if kind == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise QueryError("Missing closing parenthesis")
+            self.next()
+            return node
+        if kind in ("term", "literal"):
+            return Term(value, literal=kind == "literal")
+        if kind == "filter":
+            return Filter(*value)
+        raise QueryError(f'Expected a word or phrase, not "{kind}"')
+
+
+def parse(text, fuzzy=False, fuzzy_distance=None):
+    """Parse search box text (one query per line) into a Query.
+
+    With fuzzy, the search expands unquoted words to similar words of the
+    export, up to fuzzy_distance edits (default: by word length, see
+    fuzzy_index.default_distance).
+    """
+    lines = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            lines.append(_Parser(line).parse())
+        except QueryError as e:
+            raise QueryError(f"Line {number}: {e}") from None
+    if not lines:
+        raise QueryError("The query is empty")
+    return Query(text, lines[0] if len(lines) == 1 else Or(lines), fuzzy, fuzzy_distance)
+
+
+def quote_word_list(text):
+    """Turn a plain word list (a line of words per group) into search box text that means the same.
+
+    Word lists saved before the query language may hold words that now read
+    as operators, filters or parentheses ("AND", "(merger)", "user:bob");
+    those are quoted so they are still matched as words. Double quotes can't
+    be matched inside a quoted word and are dropped.
+    """
+    lines = []
+    for line in text.splitlines():
+        words = []
+        for word in line.replace('"', "").split():
+            try:
+                plain = _tokenize(word) == [("term", word)]
+            except QueryError:
+                plain = False
+            words.append(word if plain else f'"{word}"')
+        if words:
+            lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+class Query:
+    """A parsed query, compiled for matching.
+
+    match_sentence_spans() and match_sentences() take the message context
+    filters need: a dict with "user" ((user id, real name)),
+    "channel" ((folder name, channel name)), "deleted" (bool) and "date"
+    (the ISO day, or None).
+    """
+
+    def __init__(self, text, root, fuzzy=False, fuzzy_distance=None):
+        self.text = text
+        self.root = root
+        self.fuzzy = fuzzy
+        self.fuzzy_distance = fuzzy_distance
+        # query word -> similar words added by expand()
+        self.expansions = {}
+        self.filtered = any(isinstance(node, Filter) for node in _walk(root))
+        self._compile_terms()
+        self._compile()
+
+    def _compile_terms(self):
+        words = []
+        positive_keys = set()
+        for term, positive in self.root.terms():
+            words.extend(term.keys)
+            if positive:
+                positive_keys.update(term.keys)
+        self.matcher = TermMatcher(dict.fromkeys(words))
+        for term, _ in self.root.terms():
+            term.ids = tuple(dict.fromkeys(self.matcher.term_id(key) for key in term.keys))
+        self._positive = frozenset(self.matcher.term_id(key) for key in positive_keys)
+
+    def expand(self, vocabulary):
+        """Have unquoted single words also match their similar words in vocabulary.
+
+        vocabulary is a fuzzy_index.VocabularyIndex of the export searched.
+        """
+        self.expansions = {}
+        for term, _ in self.root.terms():
+            term.keys = [term.key]
+            if term.literal or not _WORD_RE.fullmatch(term.key):
+                continue
+            similar = [word for _, word in vocabulary.similar(term.key, self.fuzzy_distance)]
+            if similar:
+                term.keys.extend(similar)
+                self.expansions[term.key] = similar
+        self._compile_terms()
+        self._compile()
+        return self
+
+    def _compile(self):
+        # Whether a sentence without any hit can match (e.g. "NOT test"); with
+        # filters that depends on the message, so it is worked out per text
+        self._empty_matches = None if self.filtered else self.root.evaluate(_Sentence("", 0, 0, {}, None))
+        # A plain word list (lines of words) is checked with set lookups
+        self._groups = None
+        lines = self.root.children if isinstance(self.root, Or) else [self.root]
+        groups = []
+        for line in lines:
+            children = line.children if isinstance(line, And) else [line]
+            if not all(isinstance(child, Term) and len(child.ids) == 1 for child in children):
+                return
+            groups.append(frozenset(child.ids[0] for child in children))
+        self._groups = groups
+
+    def plan(self, index=None):
+        """Order clauses for evaluation; with an ExportIndex, by how many messages have each term."""
+        if index is not None:
+            def estimate(key):
+                size = index.term_size(key)
+                return _UNKNOWN if size is None else size
+        else:
+            def estimate(key):
+                # Without an index, guess that longer words and phrases are rarer
+                return 1.0 / len(key)
+        self.root.plan(estimate)
+        self._compile()
+        return self
+
+    def add_filter(self, field, values):
+        """Restrict the query to messages where field matches any of values.
+
+        For filters picked outside the query text, e.g. the channels of the
+        search form. Blank values are ignored.
+        """
+        filters = [Filter(field, value.strip()) for value in values if value.strip()]
+        if filters:
+            self.root = And([filters[0] if len(filters) == 1 else Or(filters), self.root])
+            self.filtered = True
+            self._compile()
+        return self
+
+    def normalized(self):
+        """Return a canonical form of the query: the same for the same search however it is written.
+
+        Word case and spacing, clause order and repeated clauses don't count.
+        """
+        fuzzy = f" ~{self.fuzzy_distance if self.fuzzy_distance is not None else ''}" if self.fuzzy else ""
+        return self.root.normalized() + fuzzy
+
+    def refines(self, other):
+        """True when every sentence this query matches is also matched by other.
+
+        That is the case when each line of this query has all the clauses of
+        some line of other (e.g. a word was added to a line), so its results
+        can be picked out of other's with match_sentence().
+        """
+        if (self.fuzzy, self.fuzzy_distance) != (other.fuzzy, other.fuzzy_distance):
+            return False
+        mine = _conjunctions(self.root)
+        theirs = _conjunctions(other.root)
+        if mine is None or theirs is None:
+            return False
+        return all(any(clauses <= line for clauses in theirs) for line in mine)
+
+    def accepts(self, context):
+        """False when the context alone rules out a match (e.g. another channel)."""
+        return self.root.check(context) is not False
+
+    def candidates(self, index):
+        """Return {file_id: sorted message indices} that may match, or None if the index can't tell."""
+        hits = self.root.candidates(index, {})
+        if hits is None:
+            return None
+        candidates = {}
+        for file_id, msg_idx, _field in hits:
+            candidates.setdefault(file_id, set()).add(msg_idx)
+        return {file_id: sorted(msgs) for file_id, msgs in candidates.items()}
+
+    def _matches(self, sentence):
+        if self._groups is not None:
+            found = sentence.found.keys()
+            return any(group <= found for group in self._groups)
+        return self.root.evaluate(sentence)
+
+    def match_sentence_spans(self, text, stats=None, context=None):
+        """Return (start, end, merged hit spans) for each matching sentence of text.
+
+        Hit spans are relative to the sentence start. stats (a SearchStats)
+        gets the regex and sentence splitting times.
+        """
+        if stats is not None:
+            started = time.perf_counter()
+        hits = self.matcher.find_hits(text)
+        if stats is not None:
+            stats.add("match", time.perf_counter() - started)
+        empty_matches = self._empty_matches
+        if empty_matches is None:
+            empty_matches = self.root.evaluate(_Sentence(text, 0, 0, {}, context))
+        if not hits and not empty_matches:
+            return []
+
+        hits.sort()
+        if stats is not None:
+            started = time.perf_counter()
+        sentences = split_sentences(text)
+        if stats is not None:
+            stats.add("split", time.perf_counter() - started)
+        matches = []
+        hit_index = 0
+        for start, end in sentences:
+            while hit_index < len(hits) and hits[hit_index][0] < start:
+                hit_index += 1
+            found = {}
+            while hit_index < len(hits) and hits[hit_index][0] < end:
+                hit_start, hit_end, term_id = hits[hit_index]
+                found.setdefault(term_id, []).append((hit_start, hit_end))
+                hit_index += 1
+            if not found:
+                if not empty_matches:
+                    continue
+            elif not self._matches(_Sentence(text, start, end, found, context)):
+                continue
+            spans = merge_spans((hit_start - start, hit_end - start)
+                                for term_id, term_hits in found.items() if term_id in self._positive
+                                for hit_start, hit_end in term_hits)
+            matches.append((start, end, tuple(spans)))
+        return matches
+
+    def match_sentence(self, sentence, context=None):
+        """Return the merged hit spans if sentence (one whole sentence) matches, else None."""
+        found = {}
+        for hit_start, hit_end, term_id in self.matcher.find_hits(sentence):
+            found.setdefault(term_id, []).append((hit_start, hit_end))
+        if found:
+            matched = self._matches(_Sentence(sentence, 0, len(sentence), found, context))
+        elif self._empty_matches is not None:
+            matched = self._empty_matches
+        else:
+            matched = self.root.evaluate(_Sentence(sentence, 0, 0, {}, context))
+        if not matched:
+            return None
+        return tuple(merge_spans(span for term_id, term_hits in found.items() if term_id in self._positive
+                                 for span in term_hits))
+
+    def match_sentences(self, text, stats=None, context=None):
+        """Return (sentence, merged hit spans within it) for each matching sentence."""
+        return [(text[start:end], spans) for start, end, spans in self.match_sentence_spans(text, stats, context)]
@@ -0,0 +1,125 @@
+"""Optional per-phase timing for searches.
+
+A SearchStats object is passed down the search call chain only when
+diagnostics are switched on; every instrumented spot checks ``stats is not
+None`` first, so a normal search pays for little more than that check.
+Worker processes fill their own SearchStats and the parent merges them, which
+means phase times of a parallel search are summed across workers and can add
+up to more than the wall-clock time.
+"""
+import heapq
+import json
+import time
+from contextlib import contextmanager
+
+# Phases in the order a search goes through them
+PHASES = ("cache", "plan", "read", "parse", "split", "match", "display")
+PHASE_LABELS = {
+    "cache": "Result cache lookup",
+    "plan": "Index lookup / file plan",
+    "read": "File I/O",
+    "parse": "JSON parsing",
+    "split": "Sentence splitting",
+    "match": "Regex matching",
+    "display": "Display and highlighting",
+}
+SLOWEST_FILES = 10
+
+
+class SearchStats:
+    """Phase timings, throughput counters and the slowest files of one search."""
+
+    def __init__(self, slowest=SLOWEST_FILES):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.files = 0
+        self.bytes = 0
+        self.messages = 0
+        self.results = 0
+        self.wall_time = 0.0
+        self.workers = 1
+        self._slowest_limit = slowest
+        # Min-heap of (seconds, file_path, bytes, messages) for the slowest files
+        self._slowest = []
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def add_file(self, file_path, seconds, size, messages):
+        self.files += 1
+        self.bytes += size
+        self.messages += messages
+        entry = (seconds, file_path, size, messages)
+        if len(self._slowest) < self._slowest_limit:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def merge(self, other):
+        """Add the counts and timings of another SearchStats (e.g. from a worker)."""
+        for phase, seconds in other.phases.items():
+            self.add(phase, seconds)
+        self.files += other.files
+        self.bytes += other.bytes
+        self.messages += other.messages
+        for entry in other._slowest:
+            if len(self._slowest) < self._slowest_limit:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest_files(self):
+        """Return [(seconds, file_path, bytes, messages)], slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def to_dict(self):
+        wall_time = self.wall_time or None
+        return {
+            "wall_time": self.wall_time,
+            "workers": self.workers,
+            "files": self.files,
+            "bytes": self.bytes,
+            "messages": self.messages,
+            "results": self.results,
+            "bytes_per_second": self.bytes / wall_time if wall_time else None,
+            "messages_per_second": self.messages / wall_time if wall_time else None,
+            "phases": dict(self.phases),
+            "slowest_files": [
+                {"file_path": file_path, "seconds": seconds, "bytes": size, "messages": messages}
+                for seconds, file_path, size, messages in self.slowest_files()
+            ],
+        }
+
+    def save(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def summary(self):
+        """Return a plain-text report of the search."""
+        lines = [f"Wall time: {self.wall_time:.3f} s with {self.workers} worker(s)",
+                 f"Files: {self.files}, {self.bytes / 1e6:.1f} MB, {self.messages} messages, "
+                 f"{self.results} results"]
+        if self.wall_time:
+            lines.append(f"Throughput: {self.bytes / 1e6 / self.wall_time:.1f} MB/s, "
+                         f"{self.messages / self.wall_time:.0f} messages/s")
+        lines.append("")
+        note = " (summed across workers)" if self.workers > 1 else ""
+        lines.append(f"Time per phase{note}:")
+        total = sum(self.phases.values()) or 1.0
+        for phase, seconds in self.phases.items():
+            label = PHASE_LABELS.get(phase, phase)
+            lines.append(f"  {label:<26}{seconds:>9.3f} s {seconds / total:>7.1%}")
+        slowest = self.slowest_files()
+        if slowest:
+            lines.append("")
+            lines.append(f"Slowest {len(slowest)} files:")
+            for seconds, file_path, size, messages in slowest:
+                lines.append(f"  {seconds:>8.3f} s  {size / 1e3:>9.1f} KB  {messages:>6} msgs  {file_path}")
+        return "\n".join(lines)
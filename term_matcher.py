@@ -0,0 +1,161 @@
+"""Single-pass matcher for large search word lists.
+
+All search words are compiled once per search into one case-insensitive regex
+shaped like a trie, so each message is scanned a single time no matter how
+many words are loaded. The resulting hit list drives both the query's
+sentence checks (see search_query.Query) and the highlight spans shown with
+results.
+"""
+import re
+
+# Same sentence split the search has always used
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s')
+_WORD_CHAR_RE = re.compile(r"\w")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _trie_pattern(node):
+    """Turn a character trie into a regex, longest alternatives first.
+
+    A space in a term (e.g. a phrase) matches any run of whitespace.
+    """
+    is_end = "" in node
+    branches = [(r"\s+" if char == " " else re.escape(char)) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != ""]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if is_end:
+        # Greedy optional: try the longer words first, then stop here
+        return "(?:" + body + ")?"
+    return body
+
+
+def _is_word_char(text, index):
+    return 0 <= index < len(text) and _WORD_CHAR_RE.match(text, index) is not None
+
+
+def term_key(word):
+    """Lower-case word and collapse its whitespace, as terms are compared."""
+    return " ".join(word.lower().split())
+
+
+def _text_end(text, start, key, length):
+    """Return where the first length characters of key end in text matched at start."""
+    position = start
+    for char in key[:length]:
+        if char == " ":
+            while position < len(text) and text[position].isspace():
+                position += 1
+        else:
+            position += 1
+    return position
+
+
+def split_sentences(text):
+    """Return (start, end) spans of the sentences in text."""
+    spans = []
+    start = 0
+    for boundary in SENTENCE_BOUNDARY_RE.finditer(text):
+        spans.append((start, boundary.start()))
+        start = boundary.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def merge_spans(spans):
+    """Return spans sorted, with overlapping and touching spans merged."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def highlight(sentence, spans, marker="*"):
+    """Wrap each hit span of sentence in marker, merging overlapping hits."""
+    parts = []
+    position = 0
+    for start, end in merge_spans(spans):
+        parts.append(sentence[position:start])
+        parts.append(marker + sentence[start:end] + marker)
+        position = end
+    parts.append(sentence[position:])
+    return "".join(parts)
+
+
+class TermMatcher:
+    """Find every search word hit in a text with one regex pass.
+
+    Words are matched whole and ignoring case. A word may be a phrase; its
+    spaces match any run of whitespace.
+    """
+
+    def __init__(self, words):
+        self.terms = []
+        term_ids = {}
+        for word in words:
+            key = term_key(word)
+            if key and key not in term_ids:
+                term_ids[key] = len(self.terms)
+                self.terms.append(word)
+        self._term_ids = term_ids
+        self._keys = list(term_ids)
+
+        # For a hit on a long word, the shorter words that are its prefix
+        # (e.g. "new" inside "new york") also need checking at that spot.
+        self._prefix_terms = {}
+        for key, term_id in term_ids.items():
+            prefixes = [(term_ids[key[:length]], length)
+                        for length in range(1, len(key)) if key[:length] in term_ids]
+            if prefixes:
+                self._prefix_terms[term_id] = prefixes
+
+        trie = {}
+        for key in term_ids:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        if term_ids:
+            self._pattern = re.compile(r"\b(?=(" + _trie_pattern(trie) + r")\b)", re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def term_id(self, word):
+        """Return the id of a search word, or None if it isn't one."""
+        return self._term_ids.get(term_key(word))
+
+    def _term_id(self, matched):
+        term_id = self._term_ids.get(matched.lower())
+        if term_id is None:
+            term_id = self._term_ids.get(_WHITESPACE_RE.sub(" ", matched.lower()))
+        if term_id is None:
+            # Case folding that str.lower() doesn't reproduce (rare)
+            for key, candidate in self._term_ids.items():
+                pattern = r"\s+".join(re.escape(part) for part in key.split(" "))
+                if re.fullmatch(pattern, matched, re.IGNORECASE):
+                    return candidate
+        return term_id
+
+    def find_hits(self, text):
+        """Return (start, end, term_id) for every word hit in text."""
+        if self._pattern is None:
+            return []
+        hits = []
+        for match in self._pattern.finditer(text):
+            start, end = match.span(1)
+            term_id = self._term_id(match.group(1))
+            if term_id is None:
+                continue
+            hits.append((start, end, term_id))
+            for prefix_id, length in self._prefix_terms.get(term_id, ()):
+                key = self._keys[term_id]
+                # Phrases may have matched more whitespace than their key has
+                prefix_end = start + length if end - start == len(key) else _text_end(text, start, key, length)
+                if _is_word_char(text, prefix_end - 1) != _is_word_char(text, prefix_end):
+                    hits.append((start, prefix_end, prefix_id))
+        return hits
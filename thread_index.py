@@ -0,0 +1,158 @@
+"""Where the replies of each thread are, across a channel's day files.
+
+Slack files a reply under the day it was posted and links it to its parent
+only by ``thread_ts``, so a thread started on Monday and answered on Thursday
+is spread over several files. One pass over a channel's files maps each
+thread_ts to the (file name, message index, ts) of its messages, parent
+included. The map is kept with the export (``.crawlspace/threads-<channel>.bin``,
+see search_index.data_path) and rebuilt when any of the channel's files
+changes, so a whole thread is read from just the files that hold it.
+"""
+import json
+import logging
+import os
+import zlib
+from collections import defaultdict
+
+import export_fs
+import json_stream
+import search_index
+
+log = logging.getLogger(__name__)
+
+THREADS_VERSION = 1
+
+
+def threads_path(export_root, channel_folder):
+    """Return where the thread index of a channel folder of the export at export_root is kept."""
+    channel = os.path.relpath(channel_folder, export_root).replace(os.sep, "-")
+    return search_index.data_path(export_root, f"threads-{channel}.bin")
+
+
+def channel_files(channel_folder):
+    return [file_path for file_path in export_fs.list_files(channel_folder, ".json")
+            if os.path.dirname(file_path) == channel_folder]
+
+
+def build_thread_index(export_root, channel_folder, json_files=None):
+    """Build the thread index of a channel folder, save it and return it."""
+    if json_files is None:
+        json_files = channel_files(channel_folder)
+    fingerprint = search_index.export_fingerprint(channel_folder, json_files)
+    threads = ThreadIndex.build(json_files, fingerprint)
+    try:
+        threads.save(threads_path(export_root, channel_folder))
+    except OSError as e:
+        # Still usable now; it is just rebuilt next time
+        log.warning("Error saving thread index: %s", e)
+    return threads
+
+
+def load_thread_index(export_root, channel_folder):
+    """Return the channel's thread index, building it if it is missing or out of date."""
+    json_files = channel_files(channel_folder)
+    fingerprint = search_index.export_fingerprint(channel_folder, json_files)
+    threads = ThreadIndex.load(threads_path(export_root, channel_folder))
+    if threads is not None and threads.fingerprint == fingerprint:
+        return threads
+    return build_thread_index(export_root, channel_folder, json_files)
+
+
+def build_thread_indexes(folder_path, json_files=None):
+    """Build the thread index of every channel of an export; return how many were built."""
+    if json_files is None:
+        json_files = search_index.list_json_files(folder_path)
+    by_channel = defaultdict(list)
+    for file_path in json_files:
+        channel_folder = os.path.dirname(file_path)
+        # Chat files sit in one folder per channel; skip any at the root
+        if channel_folder != folder_path:
+            by_channel[channel_folder].append(file_path)
+    for channel_folder, files in by_channel.items():
+        build_thread_index(folder_path, channel_folder, files)
+    return len(by_channel)
+
+
+def read_thread(export_root, channel_folder, thread_ts, threads=None):
+    """Return the messages of a thread, parent first and replies by ts.
+
+    Only the day files holding the thread are read.
+    """
+    if threads is None:
+        threads = load_thread_index(export_root, channel_folder)
+    by_file = defaultdict(set)
+    for file_name, message_index, _ts in threads.locations(thread_ts):
+        by_file[file_name].add(message_index)
+    messages = []
+    for file_name in sorted(by_file):
+        try:
+            items = list(json_stream.iter_items(os.path.join(channel_folder, file_name)))
+        except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+            log.warning("Skipping %s while reading a thread: %s", file_name, e)
+            continue
+        messages.extend(items[i] for i in sorted(by_file[file_name])
+                        if i < len(items) and isinstance(items[i], dict))
+    messages.sort(key=lambda message: (message.get("ts") != thread_ts, _ts_value(message.get("ts"))))
+    return messages
+
+
+def _ts_value(ts):
+    try:
+        return float(ts)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ThreadIndex:
+    """thread_ts -> [(file name, message index, ts)] of one channel."""
+
+    def __init__(self, threads, fingerprint):
+        self.threads = threads
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, json_files, fingerprint):
+        threads = {}
+        for file_path in json_files:
+            file_name = os.path.basename(file_path)
+            try:
+                for message_index, message in enumerate(json_stream.iter_items(file_path)):
+                    if isinstance(message, dict) and message.get("thread_ts"):
+                        threads.setdefault(message["thread_ts"], []).append(
+                            (file_name, message_index, message.get("ts")))
+            except (OSError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+                log.warning("Skipping %s while indexing threads: %s", file_path, e)
+        return cls(threads, fingerprint)
+
+    def locations(self, thread_ts):
+        """Return the (file name, message index, ts) of a thread's messages, or [] for an unknown thread."""
+        return self.threads.get(thread_ts, [])
+
+    def save(self, path):
+        data = zlib.compress(json.dumps({
+            "version": THREADS_VERSION,
+            "fingerprint": self.fingerprint,
+            "threads": self.threads,
+        }, separators=(",", ":")).encode("utf-8"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as threads_file:
+            threads_file.write(data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved thread index, or return None if there isn't a usable one."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as threads_file:
+                meta = json.loads(zlib.decompress(threads_file.read()))
+        except (OSError, ValueError, zlib.error) as e:
+            log.warning("Error loading thread index: %s", e)
+            return None
+        if meta.get("version") != THREADS_VERSION:
+            return None
+        threads = {thread_ts: [tuple(location) for location in locations]
+                   for thread_ts, locations in meta["threads"].items()}
+        return cls(threads, meta["fingerprint"])
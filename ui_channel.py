@@ -0,0 +1,107 @@
+"""Thread-safe hand-off of progress, results and errors to the Tk main loop.
+
+Worker threads only ever touch the channel. The Tk side polls it with
+``after`` at a fixed frame rate, so progress updates are coalesced to the
+latest value and results arrive in batches no matter how fast the worker
+produces them.
+"""
+import queue
+import threading
+
+DEFAULT_FPS = 15
+
+
+class UIChannel:
+    """Carry events from one background task to Tk callbacks.
+
+    on_progress(done, total), on_results(batch), on_error(messages) and
+    on_done(info) are always called on the Tk main thread.
+    """
+
+    def __init__(self, widget, on_progress=None, on_results=None, on_error=None, on_done=None, fps=DEFAULT_FPS):
+        self._widget = widget
+        self._interval = max(1, int(1000 / fps))
+        self._on_progress = on_progress
+        self._on_results = on_results
+        self._on_error = on_error
+        self._on_done = on_done
+
+        self._lock = threading.Lock()
+        self._progress = None
+        self._results = []
+        self._events = queue.SimpleQueue()
+        self._closed = False
+
+    # Worker side
+
+    def progress(self, done, total):
+        with self._lock:
+            self._progress = (done, total)
+
+    def add_result(self, result):
+        with self._lock:
+            self._results.append(result)
+
+    def add_results(self, results):
+        with self._lock:
+            self._results.extend(results)
+
+    def error(self, message):
+        self._events.put(("error", message))
+
+    def close(self, **info):
+        """Signal that the task finished; info is passed on to on_done."""
+        self._events.put(("done", info))
+
+    # Tk side
+
+    def start(self):
+        self._widget.after(self._interval, self._poll)
+
+    def _poll(self):
+        with self._lock:
+            progress, self._progress = self._progress, None
+            results, self._results = self._results, []
+
+        errors = []
+        done = None
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                errors.append(payload)
+            else:
+                done = payload
+
+        try:
+            if progress is not None and self._on_progress:
+                self._on_progress(*progress)
+            if results and self._on_results:
+                self._on_results(results)
+            if errors and self._on_error:
+                self._on_error(errors)
+        finally:
+            # A failing callback must not leave the channel open and the UI waiting forever
+            self._finish_poll(done)
+
+    def _finish_poll(self, done):
+        if done is not None:
+            self._closed = True
+            # Anything the worker added right before closing
+            with self._lock:
+                results, self._results = self._results, []
+            try:
+                if results and self._on_results:
+                    self._on_results(results)
+            finally:
+                if self._on_done:
+                    self._on_done(done)
+            return
+
+        try:
+            self._widget.after(self._interval, self._poll)
+        except RuntimeError:
+            # The main loop has gone away
+            pass
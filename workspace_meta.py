@@ -0,0 +1,141 @@
+"""Cached lookups for the workspace metadata files of a Slack export.
+
+users.json, channels.json, groups.json, dms.json and mpims.json are each
+loaded at most once per export (and only when first needed) into dictionaries
+keyed by id. A file is reloaded when its size or mtime changes.
+"""
+import json
+import logging
+import os
+import threading
+
+import export_fs
+import json_stream
+
+log = logging.getLogger(__name__)
+
+METADATA_FILES = ("users.json", "channels.json", "groups.json", "dms.json", "mpims.json")
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+
+def find_export_root(file_path, fallback=None):
+    """Return the export folder a chat file belongs to.
+
+    Walks up from the file's folder looking for users.json or channels.json,
+    which Slack writes to the root of every export.
+    """
+    folder = os.path.dirname(os.path.abspath(file_path))
+    for _ in range(3):
+        if any(export_fs.exists(os.path.join(folder, name)) for name in ("users.json", "channels.json")):
+            return folder
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+    return fallback or os.path.dirname(os.path.dirname(os.path.abspath(file_path)))
+
+
+def get_workspace(folder_path):
+    """Return the shared metadata cache for an export folder."""
+    key = os.path.abspath(folder_path)
+    with _workspaces_lock:
+        workspace = _workspaces.get(key)
+        if workspace is None:
+            workspace = _workspaces[key] = WorkspaceMetadata(key)
+    workspace.refresh()
+    return workspace
+
+
+class WorkspaceMetadata:
+    """Id-keyed users and conversations for one export folder."""
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self._lock = threading.Lock()
+        # file name -> ((size, mtime_ns), {id: object})
+        self._tables = {}
+        self._folders = None
+
+    def refresh(self):
+        """Forget any loaded table whose file has changed on disk."""
+        with self._lock:
+            for name, (signature, _) in list(self._tables.items()):
+                if self._signature(name) != signature:
+                    del self._tables[name]
+                    self._folders = None
+
+    def _signature(self, name):
+        try:
+            return export_fs.signature(os.path.join(self.folder_path, name))
+        except (OSError,) + export_fs.ARCHIVE_ERRORS:
+            return None
+
+    def _table(self, name):
+        entry = self._tables.get(name)
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            entry = self._tables.get(name)
+            if entry is None:
+                entry = self._tables[name] = (self._signature(name), self._load(name))
+        return entry[1]
+
+    def _load(self, name):
+        path = os.path.join(self.folder_path, name)
+        if not export_fs.exists(path):
+            return {}
+        try:
+            data = json_stream.load_file(path)
+            if not isinstance(data, list):
+                raise ValueError(f"The {name} file must be an array of objects.")
+        except (OSError, json.JSONDecodeError, ValueError) + export_fs.ARCHIVE_ERRORS as e:
+            log.warning("Error loading %s: %s", name, e)
+            return {}
+        return {item["id"]: item for item in data if isinstance(item, dict) and "id" in item}
+
+    @property
+    def users(self):
+        return self._table("users.json")
+
+    def real_name(self, user_id, default="Unknown User"):
+        """Get the real name of a user, falling back to their display or user name."""
+        user = self.users.get(user_id)
+        if not user:
+            return default
+        profile = user.get("profile", {})
+        return profile.get("real_name") or user.get("real_name") or user.get("name") or default
+
+    def conversations(self):
+        """Yield every channel, private group, DM and group DM in the export."""
+        for name in METADATA_FILES[1:]:
+            yield from self._table(name).values()
+
+    def _conversations_by_folder(self):
+        # Export folders are named after the channel, or the id for DMs
+        if self._folders is None:
+            folders = {}
+            for conversation in self.conversations():
+                folders[conversation.get("name") or conversation["id"]] = conversation
+                folders.setdefault(conversation["id"], conversation)
+            self._folders = folders
+        return self._folders
+
+    def conversation_for_path(self, file_path):
+        """Return the channel/group/DM object for a chat file, if known."""
+        folder_name = os.path.basename(os.path.dirname(file_path))
+        return self._conversations_by_folder().get(folder_name)
+
+    def channel_name(self, file_path):
+        """Return a readable channel name for a chat file."""
+        folder_name = os.path.basename(os.path.dirname(file_path))
+        conversation = self.conversation_for_path(file_path)
+        if conversation is None:
+            return folder_name
+        if conversation.get("name"):
+            return f"#{conversation['name']}"
+        members = conversation.get("members") or []
+        if members:
+            return "DM: " + ", ".join(self.real_name(member) for member in members)
+        return folder_name